@@ -24,10 +24,15 @@ Business Context:
 """
 
 import os
-import re
 import sys
+import numpy as np
 import pandas as pd
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from rapidfuzz import fuzz, process as fuzz_process
+
+from loaders import read_csv_as_str, read_new_entrants_for_airport
 
 # ============================================================================
 # AIRLINE GROUP DEFINITIONS
@@ -188,103 +193,23 @@ def get_iata_codes_for_airport(group, airport_code=None):
     return codes
 
 
-def parse_int_departures(x):
-    """
-    Robustly parse numeric values from various string formats.
-
-    Args:
-        x: Value to parse (can be string, int, float, or NA)
-
-    Returns:
-        int: Parsed integer value, defaults to 0 for invalid inputs
-
-    Handles:
-        - Comma-separated numbers (e.g., "1,234")
-        - Percentage signs
-        - Whitespace
-        - Empty strings and NA values
-    """
-    if pd.isna(x):
-        return 0
-    s = str(x).strip()
-    if s == "":
-        return 0
-
-    # Extract numeric pattern with optional commas
-    m = re.search(r"(-?\d{1,3}(?:[,\d]{0,15})?)", s)
-    if not m:
-        return 0
-
-    # Remove commas and convert to integer
-    num = m.group(1).replace(',', '')
-    try:
-        return int(float(num))
-    except Exception:
-        return 0
-
-
-def read_new_entrants_for_airport(airport_code, slots_dir=SLOTS_DIR):
-    """
-    Read new entrant airlines for a specific airport.
-
-    Args:
-        airport_code (str): Three-letter airport IATA code
-        slots_dir (str): Directory containing new entrant CSV files
-
-    Returns:
-        list: IATA codes of new entrant airlines for this airport
-
-    Note:
-        New entrants are airlines that entered the market after Air Berlin's
-        collapse, potentially filling the capacity gap left behind.
-
-    File Format:
-        Expected file: {airport_code}_NEW_ENTRANT.csv with 'AIRLINE_CODE' column
-    """
-    fname = os.path.join(slots_dir, f"{airport_code}_NEW_ENTRANT.csv")
-
-    if not os.path.isfile(fname):
-        return []
-
-    try:
-        df = pd.read_csv(fname, dtype=str)
-    except Exception:
-        return []
-
-    # Normalize column names to uppercase
-    df.columns = [c.strip().upper() for c in df.columns]
-
-    # Find the airline code column with various possible names
-    if "AIRLINE_CODE" not in df.columns:
-        for alt in ("AIRLINE", "AIRLINE_IATA", "IATA", "AIRLINECODE"):
-            if alt in df.columns:
-                df = df.rename(columns={alt: "AIRLINE_CODE"})
-                break
-
-    if "AIRLINE_CODE" not in df.columns:
-        return []
-
-    # Extract and clean airline codes
-    codes = df["AIRLINE_CODE"].dropna().astype(str).str.strip().tolist()
-    codes = [c for c in codes if c]
-    return codes
-
-
-def read_airport_csv(path):
+def read_airport_frame(path):
     """
-    Read airport CSV file and extract departure counts by airline and season.
+    Read airport CSV file into a frame of departure counts by airline and season.
 
     Args:
         path (str): Path to airport CSV file
 
     Returns:
-        dict: Nested dictionary {airline_code: {season: departure_count}}
+        DataFrame: One row per airline with an upper-cased 'AIRLINE_CODE'
+                   column and one int32 column per season (S15-S19)
 
-    Data Structure:
-        The CSV contains one row per airline with columns for each season (S15-S19).
-        This function pivots the data into a format suitable for group aggregation.
+    Performance:
+        Season columns are parsed as whole columns with pandas string methods
+        rather than cell by cell, so the cost no longer scales with the number
+        of (airline, season) pairs in Python.
     """
-    df = pd.read_csv(path, dtype=str)
+    df = read_csv_as_str(path)
     df.columns = [c.strip() for c in df.columns]
 
     # Identify the airline code column
@@ -298,33 +223,45 @@ def read_airport_csv(path):
     if code_col is None:
         code_col = df.columns[0]
 
-    # Build airline-to-seasons dictionary
-    data = {}
-    for _, row in df.iterrows():
-        airline_code = str(row.get(code_col, "")).strip()
-        if airline_code == "":
+    # Airline name column (optional), used to classify codes missing from
+    # the group definitions
+    name_col = next(
+        (c for c in df.columns if c.lower().replace(' ', '') == "airlinename"), None
+    )
+
+    # Resolve each season to its column once (exact match, then prefix match
+    # such as "S15 Departures")
+    season_col = {}
+    for s in SEASONS:
+        if s in df.columns:
+            season_col[s] = s
+        else:
+            season_col[s] = next(
+                (c for c in df.columns if c.strip().upper().startswith(s.upper())), None
+            )
+
+    # Parse every season column in one vectorized pass; missing columns and
+    # unparseable cells count as 0 departures. Slot counts are far below
+    # 2**31, so int32 halves the memory moved by the aggregation.
+    # Codes are normalized (stripped, upper-cased) once here; every later
+    # lookup uses them as-is
+    out = pd.DataFrame({"AIRLINE_CODE": df[code_col].str.strip().str.upper()})
+    if name_col is not None:
+        out["AIRLINE_NAME"] = df[name_col].str.strip()
+    for s, col in season_col.items():
+        if col is None:
+            out[s] = np.zeros(len(out), dtype=np.int32)
             continue
+        digits = (
+            df[col].astype(str)
+            .str.replace(',', '', regex=False)
+            .str.extract(r'(-?\d+)', expand=False)
+        )
+        out[s] = pd.to_numeric(digits, errors='coerce').fillna(0).astype(np.int32)
 
-        # Extract departure counts for each season
-        season_values = {}
-        for s in SEASONS:
-            # Try direct column match first
-            if s in df.columns:
-                raw = row[s]
-            else:
-                # Try prefix match (e.g., "S15 Departures")
-                cand = None
-                for c in df.columns:
-                    if c.strip().upper().startswith(s.upper()):
-                        cand = c
-                        break
-                raw = row[cand] if cand else None
-
-            season_values[s] = parse_int_departures(raw)
-
-        data[airline_code] = season_values
-
-    return data
+    # Skip rows without an airline code; later rows win for repeated codes
+    out = out[out["AIRLINE_CODE"].notna() & (out["AIRLINE_CODE"] != "")]
+    return out.drop_duplicates(subset="AIRLINE_CODE", keep='last')
 
 
 def write_csv_for_airport(airport_code, df, out_dir):
@@ -338,16 +275,169 @@ def write_csv_for_airport(airport_code, df, out_dir):
 
     Output:
         Writes CSV file to: {out_dir}/{airport_code}.csv
+
+    Note:
+        The frame is a small block of plain integers with fixed columns, so
+        rows are formatted directly and written in one call rather than going
+        through DataFrame.to_csv's per-cell formatting. The file layout is the
+        same as to_csv with the index written.
     """
     os.makedirs(out_dir, exist_ok=True)
     out_path = os.path.join(out_dir, f"{airport_code}.csv")
-    df.to_csv(out_path)
+
+    lines = [",".join([df.index.name or ""] + [str(c) for c in df.columns])]
+    lines.extend(
+        ",".join([str(group)] + [str(v) for v in values])
+        for group, values in zip(df.index, df.to_numpy().tolist())
+    )
+    with open(out_path, "w") as f:
+        f.write("\n".join(lines) + "\n")
     print(f"Wrote: {out_path}")
 
+# ============================================================================
+# GROUP LOOKUP
+# ============================================================================
+
+# Airline groups in output row order (new entrants are appended per airport)
+AIRLINE_GROUPS = {
+    "LUFTHANSA_GROUP": LUFTHANSA_GROUP,
+    "AIR_BERLIN_GROUP": AIR_BERLIN_GROUP,
+    "LowCostCarrier_GROUP": LowCostCarrier_GROUP,
+    "legacy_group": legacy_group,
+    "regional_and_others": regional_and_others,
+}
+
+# Flat IATA code -> group name lookup, built once at import so classifying an
+# airline is a single dict access instead of a scan over every group list.
+# The first group listing a code wins. Codes and group names are interned
+# since this small vocabulary is hashed on every lookup.
+AIRLINE_GROUP_OF = {}
+for _group_name, _group in AIRLINE_GROUPS.items():
+    for _code in get_iata_codes_for_airport(_group):
+        AIRLINE_GROUP_OF.setdefault(sys.intern(str(_code).strip().upper()), sys.intern(_group_name))
+
+# Codes already claimed by a regular group (case-normalized); identical for
+# every airport, so new-entrant filtering never rebuilds it
+_KNOWN_CODES = frozenset(AIRLINE_GROUP_OF)
+
+# Row order of every per-airport output file
+GROUP_ORDER = [sys.intern(g) for g in AIRLINE_GROUPS] + [sys.intern("new_entrants")]
+GROUP_INDEX = {g: i for i, g in enumerate(GROUP_ORDER)}
+
+# Canonical (upper-cased) airline name -> group name, for slot files that list
+# an airline under a code variant the group definitions don't know. The first
+# group listing a name wins.
+_CANON_GROUP_OF = {}
+for _group_name, _group in AIRLINE_GROUPS.items():
+    for _entry in _group:
+        if _entry.get("airlineName"):
+            _CANON_GROUP_OF.setdefault(_entry["airlineName"].strip().upper(), _group_name)
+_CANON_NAMES = tuple(_CANON_GROUP_OF)
+
+# Minimum similarity (0-100) for a name variant to count as the same airline
+NAME_MATCH_CUTOFF = 90
+
+
+@lru_cache(maxsize=None)
+def match_group_by_name(name):
+    """
+    Find the airline group whose canonical airline name matches a name variant.
+
+    Args:
+        name (str): Airline name as written in a slot file
+
+    Returns:
+        str or None: Group name, or None if no canonical name scores at least
+                     NAME_MATCH_CUTOFF
+
+    Note:
+        rapidfuzz's process.extractOne scans the canonical names in compiled
+        code, scoring with fuzz.ratio: the normalized Indel similarity
+        (0-100), based on the fewest insertions and deletions turning one
+        name into the other. Token and partial scorers are not used, since
+        they rate unrelated carriers sharing words like "Air" or "GmbH" as
+        near matches. Results are cached within the process, since the same
+        names recur across rows.
+    """
+    key = str(name).strip().upper()
+    if not key:
+        return None
+    match = fuzz_process.extractOne(
+        key, _CANON_NAMES, scorer=fuzz.ratio, score_cutoff=NAME_MATCH_CUTOFF
+    )
+    return _CANON_GROUP_OF[match[0]] if match else None
+
 # ============================================================================
 # MAIN AGGREGATION LOGIC
 # ============================================================================
 
+def _accumulate(cell_idx, seasons, n_cells):
+    """
+    Sum season rows into output cells.
+
+    Args:
+        cell_idx (ndarray): Output cell index (airport x group) for each row
+        seasons (ndarray): Integer array of shape (rows, seasons)
+        n_cells (int): Number of output cells
+
+    Returns:
+        ndarray: Array of shape (n_cells, seasons) with per-cell sums, in the
+                 same integer dtype as seasons
+
+    Note:
+        np.bincount runs the whole segmented sum in one compiled loop per
+        season column, which is much faster than np.add.at's unbuffered
+        scatter. Its float weights are exact for counts below 2**53.
+    """
+    out = np.empty((n_cells, seasons.shape[1]), dtype=seasons.dtype)
+    for j in range(seasons.shape[1]):
+        out[:, j] = np.bincount(cell_idx, weights=seasons[:, j], minlength=n_cells)
+    return out
+
+
+def process_airport(airport, slots_dir=SLOTS_DIR):
+    """
+    Read one airport's slot file and classify its airlines into groups.
+
+    Args:
+        airport (str): Three-letter airport IATA code
+        slots_dir (str): Directory containing input slot CSV files
+
+    Returns:
+        DataFrame or None: Airport frame with 'GROUP' and 'AIRPORT' columns
+                           added, or None if the airport file is missing
+
+    Note:
+        Kept at module level (and free of shared state) so aggregate_slots
+        can dispatch airports to worker processes.
+    """
+    path = os.path.join(slots_dir, f"{airport}.csv")
+
+    # Check if airport data file exists
+    if not os.path.isfile(path):
+        print(f"Warning: file not found for {airport} at {path} -- skipping")
+        return None
+
+    # Read slot data for this airport
+    df = read_airport_frame(path)
+
+    # Filter new entrants: exclude airlines already in other groups
+    new_entrants_set = set(read_new_entrants_for_airport(airport, slots_dir)) - _KNOWN_CODES
+
+    # Classify each airline: regular groups by code, then this airport's
+    # listed new entrants, then by airline name; anything else stays
+    # unassigned and is dropped later
+    codes = df["AIRLINE_CODE"]
+    group = codes.map(AIRLINE_GROUP_OF)
+    group = group.mask(group.isna() & codes.isin(new_entrants_set), "new_entrants")
+    if "AIRLINE_NAME" in df.columns:
+        by_name = group.isna() & df["AIRLINE_NAME"].notna()
+        group[by_name] = df.loc[by_name, "AIRLINE_NAME"].map(match_group_by_name)
+    df["GROUP"] = group
+    df["AIRPORT"] = airport
+    return df
+
+
 def aggregate_slots(airport_codes, slots_dir=SLOTS_DIR, output_dir=OUTPUT_DIR_NAME):
     """
     Main function to aggregate slot data across all airports and airline groups.
@@ -356,7 +446,7 @@ def aggregate_slots(airport_codes, slots_dir=SLOTS_DIR, output_dir=OUTPUT_DIR_NA
         1. For each airport, read the slot allocation CSV
         2. Load new entrants specific to that airport
         3. Classify each airline into its appropriate group
-        4. Aggregate slot counts by group and season
+        4. Aggregate slot counts by airport, group and season in one pass
         5. Write results to individual airport CSV files
 
     Args:
@@ -372,78 +462,46 @@ def aggregate_slots(airport_codes, slots_dir=SLOTS_DIR, output_dir=OUTPUT_DIR_NA
     # Ensure output directory exists
     os.makedirs(output_dir, exist_ok=True)
 
-    for airport in airport_codes:
-        path = os.path.join(slots_dir, f"{airport}.csv")
-
-        # Check if airport data file exists
-        if not os.path.isfile(path):
-            print(f"Warning: file not found for {airport} at {path} -- skipping")
-            continue
-
-        # Read slot data for this airport
-        data = read_airport_csv(path)
-
-        # Extract IATA codes for each airline group
-        lufthansa_codes = get_iata_codes_for_airport(LUFTHANSA_GROUP, airport)
-        air_berlin_codes = get_iata_codes_for_airport(AIR_BERLIN_GROUP, airport)
-        lowcost_codes = get_iata_codes_for_airport(LowCostCarrier_GROUP, airport)
-        legacy_codes = get_iata_codes_for_airport(legacy_group, airport)
-        regional_codes = get_iata_codes_for_airport(regional_and_others, airport)
-
-        # Build set of existing codes (case-normalized) to prevent duplicates
-        existing_codes = set()
-        for c in (lufthansa_codes + air_berlin_codes + lowcost_codes + legacy_codes + regional_codes):
-            if c:
-                existing_codes.add(str(c).strip().upper())
-
-        # Filter new entrants: exclude airlines already in other groups
-        new_entrants_raw = read_new_entrants_for_airport(airport, slots_dir)
-        new_entrants_filtered = []
-        for c in new_entrants_raw:
-            if not c:
-                continue
-            cs = str(c).strip()
-            if cs.upper() in existing_codes:
-                continue  # Skip if already classified in another group
-            new_entrants_filtered.append(cs)
-
-        # Map group names to their airline codes
-        groups_map = {
-            "LUFTHANSA_GROUP": lufthansa_codes,
-            "AIR_BERLIN_GROUP": air_berlin_codes,
-            "LowCostCarrier_GROUP": lowcost_codes,
-            "legacy_group": legacy_codes,
-            "regional_and_others": regional_codes,
-            "new_entrants": new_entrants_filtered,
-        }
-
-        # Aggregate departure counts by group and season
-        agg = {}
-        for group_name, codes in groups_map.items():
-            # Initialize season sums for this group
-            season_sums = {s: 0 for s in SEASONS}
-
-            # Sum departures across all airlines in this group
-            for code in codes:
-                code = str(code).strip()
-
-                # Try multiple case variations to find airline data
-                row = data.get(code) or data.get(code.upper()) or data.get(code.lower())
-
-                if row:
-                    for s in SEASONS:
-                        season_sums[s] += int(row.get(s, 0) or 0)
-
-            agg[group_name] = season_sums
-
-        # Convert aggregated data to DataFrame (groups as rows, seasons as columns)
-        df = pd.DataFrame.from_dict(agg, orient='index')
-        df.index.name = "GROUP"
-
-        # Ensure correct column order
-        df = df[SEASONS]
-
-        # Write output CSV for this airport
+    # Read and classify every airport into one long frame so the aggregation
+    # below is a single vectorized pass instead of one Python loop per airport.
+    # Airports are independent, so they are read in worker processes unless
+    # AIRBERLIN_SERIAL=1 is set (useful for debugging and profiling).
+    # A single pyarrow.dataset scan over slots/*.csv is not used: the slot
+    # files differ in header spelling, season columns and leading blank
+    # lines, and a dataset scan applies one schema to every file.
+    n_workers = min(len(airport_codes), os.cpu_count() or 1)
+    if os.environ.get("AIRBERLIN_SERIAL") == "1" or n_workers <= 1:
+        results = [process_airport(a, slots_dir) for a in airport_codes]
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            results = list(ex.map(process_airport, airport_codes, [slots_dir] * len(airport_codes)))
+    airports = [a for a, f in zip(airport_codes, results) if f is not None]
+    frames = [f for f in results if f is not None]
+
+    if not frames:
+        return
+
+    # Aggregate departure counts by airport, group and season in one pass
+    # into an (airport, group, season) array; unassigned airlines have no
+    # group index and are skipped
+    big = pd.concat(frames, ignore_index=True)
+    airport_index = {a: i for i, a in enumerate(airports)}
+    airport_idx = big["AIRPORT"].map(airport_index).to_numpy()
+    group_idx = big["GROUP"].map(GROUP_INDEX).fillna(-1).astype(np.int64).to_numpy()
+    keep = group_idx >= 0
+
+    cell_idx = airport_idx[keep] * len(GROUP_ORDER) + group_idx[keep]
+    arr = _accumulate(
+        cell_idx,
+        big.loc[keep, SEASONS].to_numpy(dtype=np.int32),
+        len(airports) * len(GROUP_ORDER),
+    ).reshape(len(airports), len(GROUP_ORDER), len(SEASONS))
+
+    group_index = pd.Index(GROUP_ORDER, name="GROUP")
+    for airport in airports:
+        # Write output CSV for this airport (groups as rows, seasons as columns);
+        # the frame wraps the int32 slice directly, with no dtype inference
+        df = pd.DataFrame(arr[airport_index[airport]], index=group_index, columns=SEASONS, copy=False)
         write_csv_for_airport(airport, df, output_dir)
 
 # ============================================================================
@@ -225,10 +225,9 @@ def main():
     print("\n" + "="*80)
     print("50% RULE COMPLIANCE SUMMARY")
     print("="*80)
-    for _, row in df_out.iterrows():
-        airport = row["Airport Code"]
-        slots_avail = row["Slots available"]
-        pct = float(row["Pct_taken_by_new_entrants"])
+    summary_cols = ["Airport Code", "Slots available", "Pct_taken_by_new_entrants"]
+    for airport, slots_avail, pct in df_out[summary_cols].itertuples(index=False, name=None):
+        pct = float(pct)
 
         if slots_avail == 0:
             status = "N/A (no slots available)"
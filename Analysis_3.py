@@ -58,8 +58,13 @@ Key Insights:
 
 import os
 import re
+import numpy as np
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+
+from loaders import read_csv_as_str, read_csv_columns, read_new_entrants_for_airport
 
 # ============================================================================
 # AIRLINE GROUP DEFINITIONS
@@ -191,12 +196,20 @@ SEASON_NAMES = {
     "S19": "Summer 2019"
 }
 
+# Share column names tried for each season, in order of preference
+SHARE_COLUMN_CANDIDATES = {
+    s: (f"Share_{s}", f"Share {s}", s, f"Share_{s}%") for s in SEASONS
+}
+
 # Input directory containing slot allocation data with market share percentages
 SLOTS_DIR = "slots"
 
 # Output directory for HHI analysis results
 OUTPUT_DIR = "Result3"
 
+# Numeric part of a percentage value
+_PERCENT_RE = re.compile(r"(-?\d+(?:\.\d+)?)")
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
@@ -222,41 +235,132 @@ def get_iata_codes_from_group(group):
     return codes
 
 
-def parse_percent(s):
+def parse_percent_series(values):
     """
-    Parse percentage value from string, handling various formats.
+    Parse a whole column of percentage values at once.
 
     Args:
-        s: Value to parse (can be string, numeric, or NA)
+        values (Series): Column of strings (or NA values) to parse
 
     Returns:
-        float: Parsed percentage value, defaults to 0.0 for invalid inputs
+        Series: Parsed float percentages, 0.0 wherever parsing fails
 
     Handles:
         - Percentage signs (e.g., "45.5%")
-        - Comma decimal separators (European format)
+        - Thousands separators (commas are removed)
         - Whitespace and empty strings
         - Negative values
         - NA/None values
+
+    Note:
+        Pandas string methods run the cleanup and regex over the whole column
+        instead of one Python call per cell.
     """
-    if s is None:
-        return 0.0
-    s = str(s).strip()
-    if s == "":
-        return 0.0
-    
-    # Remove percentage sign and handle comma decimals
-    s = s.replace("%", "").replace(",", "")
-    
-    # Extract numeric value
-    match = re.search(r"-?\d+(?:\.\d+)?", s)
-    if not match:
-        return 0.0
-    
-    try:
-        return float(match.group(0))
-    except Exception:
-        return 0.0
+    digits = (
+        values.astype(str)
+        .str.replace("%", "", regex=False)
+        .str.replace(",", "", regex=False)
+        .str.extract(_PERCENT_RE.pattern, expand=False)
+    )
+    return pd.to_numeric(digits, errors="coerce").fillna(0.0)
+
+
+def group_share_sums(shares, group_ids, n_groups):
+    """
+    Sum airline market shares into their groups for every season.
+
+    Args:
+        shares (ndarray): Float array of shape (airlines, seasons)
+        group_ids (ndarray): Group index of each airline row
+        n_groups (int): Number of groups
+
+    Returns:
+        ndarray: Array of shape (n_groups, seasons); groups without airlines
+                 are 0
+
+    Note:
+        np.bincount runs each season's grouped sum as one compiled loop,
+        avoiding pandas groupby overhead on these small per-airport tables.
+    """
+    out = np.zeros((n_groups, shares.shape[1]))
+    for j in range(shares.shape[1]):
+        out[:, j] = np.bincount(group_ids, weights=shares[:, j], minlength=n_groups)
+    return out
+
+
+def hhi_from_group_shares(group_sums):
+    """
+    Compute the HHI of each season from group market shares.
+
+    Args:
+        group_sums (ndarray): Group shares (0-100 scale) of shape (groups, seasons)
+
+    Returns:
+        ndarray: HHI per season, the sum of squared group shares
+    """
+    return (group_sums ** 2).sum(axis=0)
+
+
+@lru_cache(maxsize=None)
+def resolve_share_columns(columns):
+    """
+    Resolve the airline code column and each season's share column.
+
+    Args:
+        columns (tuple): Stripped column names of an airport slot file
+
+    Returns:
+        tuple: (code_col, ((season, share_col or None), ...))
+
+    Note:
+        Cached on the header, so airport files sharing a layout are
+        resolved only once per run.
+    """
+    # Identify airline code column
+    code_col = next(
+        (c for c in columns if c.lower() in ("airline code", "airlinecode", "iata", "code")),
+        columns[0],
+    )
+
+    # Resolve each season's share column by trying different name patterns
+    season_col = []
+    for s in SEASONS:
+        col = next((c for c in SHARE_COLUMN_CANDIDATES[s] if c in columns), None)
+        if col is None:
+            col = next((c for c in columns if s in c.upper() and "SHARE" in c.upper()), None)
+        season_col.append((s, col))
+    return code_col, tuple(season_col)
+
+
+def read_airport_shares(path):
+    """
+    Read the airline code and market share columns of an airport slot file.
+
+    Args:
+        path (str): Path to airport CSV file
+
+    Returns:
+        tuple: (DataFrame, code_col, season_col) where the frame holds only
+               the code and share columns as strings (names stripped), and
+               season_col maps each season to its share column or None
+
+    Note:
+        The header is read first so the columns can be resolved up front;
+        the file is then parsed with usecols, skipping the airline names,
+        raw departure counts and trailing empty columns entirely.
+    """
+    columns = {c.strip(): c for c in read_csv_columns(path)}
+    code_col, season_items = resolve_share_columns(tuple(columns))
+    season_col = dict(season_items)
+
+    needed = dict.fromkeys([code_col] + [c for c in season_col.values() if c is not None])
+    df = read_csv_as_str(path, usecols=[columns[c] for c in needed])
+
+    # Strip only the names that need it, straight from the resolved mapping
+    renames = {columns[c]: c for c in needed if columns[c] != c}
+    if renames:
+        df = df.rename(columns=renames)
+    return df, code_col, season_col
 
 
 def get_market_classification(hhi):
@@ -282,6 +386,24 @@ def get_market_classification(hhi):
         return "Highly Concentrated"
 
 
+def classify_hhi(hhi_values):
+    """
+    Classify many HHI values at once (vectorized get_market_classification).
+
+    Args:
+        hhi_values (array-like): Herfindahl-Hirschman Index values
+
+    Returns:
+        ndarray: Market classification category for each value
+    """
+    hhi = np.asarray(hhi_values, dtype=np.float64)
+    return np.select(
+        [hhi < 1500, hhi <= 2500],
+        ["Unconcentrated (Competitive)", "Moderately Concentrated"],
+        default="Highly Concentrated",
+    )
+
+
 def get_market_trend(hhi_values):
     """
     Analyze trend in HHI over time to identify concentration patterns.
@@ -305,8 +427,12 @@ def get_market_trend(hhi_values):
     if len(hhi_values) < 2:
         return "Insufficient data"
     
-    first_half_avg = sum(hhi_values[:len(hhi_values)//2]) / (len(hhi_values)//2)
-    second_half_avg = sum(hhi_values[len(hhi_values)//2:]) / (len(hhi_values) - len(hhi_values)//2)
+    # Split at n//2 (np.array_split would put the odd middle value in the
+    # first half instead of the second)
+    values = np.asarray(hhi_values, dtype=np.float64)
+    first_half, second_half = np.split(values, [len(values) // 2])
+    first_half_avg = first_half.mean()
+    second_half_avg = second_half.mean()
     
     change = second_half_avg - first_half_avg
     pct_change = (change / first_half_avg * 100) if first_half_avg > 0 else 0
@@ -319,55 +445,138 @@ def get_market_trend(hhi_values):
         return f"Decreasing Concentration ({pct_change:.1f}%)"
 
 
-def read_new_entrants_for_airport(airport_code):
+# ============================================================================
+# MAIN HHI COMPUTATION FUNCTION
+# ============================================================================
+
+def process_airport(airport, groups, existing_codes_set, base_code_to_group, run_ts=None):
     """
-    Read new entrant airlines for a specific airport from CSV file.
+    Compute market shares and HHI for one airport and write its breakdown CSV.
 
     Args:
-        airport_code (str): Three-letter airport IATA code
+        airport (str): Three-letter airport IATA code
+        groups (dict): Group name -> list of IATA codes (regular groups)
+        existing_codes_set (frozenset): Codes claimed by the regular groups
+        base_code_to_group (dict): Code -> group name for the regular groups
+        run_ts (str, optional): Timestamp for the "Generated:" line, shared by
+            every airport of a run; defaults to now
 
     Returns:
-        list: IATA codes of new entrant airlines for this airport
+        tuple: (seasonal HHI rows as a DataFrame, airport summary dict,
+               diagnostics message, list of progress lines to print); the
+               first two are None if the airport file is missing or unreadable
 
     Note:
-        New entrants are airlines that entered the market after Air Berlin's
-        collapse, potentially filling the capacity gap left behind. Their
-        market participation affects HHI calculations.
-
-    File Format:
-        Expected file: {airport_code}_NEW_ENTRANT.csv with airline code column
+        Kept at module level and free of shared state so compute_hhi can
+        dispatch airports to worker processes. Progress lines are returned
+        rather than printed so the log stays in airport order.
     """
-    fname = os.path.join(SLOTS_DIR, f"{airport_code}_NEW_ENTRANT.csv")
-    if not os.path.isfile(fname):
-        return []
-    
+    airport_file = os.path.join(SLOTS_DIR, f"{airport}.csv")
+    if not os.path.isfile(airport_file):
+        return None, None, f"⚠ Missing airport file: {airport_file}", ["  ⚠ Missing data file"]
+
     try:
-        df = pd.read_csv(fname, dtype=str)
-    except Exception:
-        return []
-    
-    df.columns = [c.strip().upper() for c in df.columns]
-    
-    # Find the airline code column
-    col = None
-    for candidate in ("AIRLINE_CODE", "AIRLINE", "IATA", "AIRLINECODE"):
-        if candidate in df.columns:
-            col = candidate
-            break
-    
-    if col is None:
-        if len(df.columns) >= 2:
-            col = df.columns[1]
-        else:
-            return []
-    
-    codes = df[col].dropna().astype(str).str.strip().str.upper().tolist()
-    return [c for c in codes if c]
+        df_air, code_col, season_col = read_airport_shares(airport_file)
+    except Exception as e:
+        return None, None, f"⚠ Error reading {airport_file}: {e}", [f"  ⚠ Error reading file: {e}"]
+
+    # Process new entrants (codes arrive upper-cased); sorted so the
+    # group's code list does not depend on set iteration order
+    ne_codes_raw = read_new_entrants_for_airport(airport, SLOTS_DIR)
+    new_entrants_codes = sorted(set(ne_codes_raw) - existing_codes_set)
+
+    # Create local groups including new entrants
+    groups_local = {k: list(v) for k, v in groups.items()}
+    if new_entrants_codes:
+        groups_local["New Entrants"] = new_entrants_codes
+
+    # Extend the run-wide code -> group lookup with this airport's new
+    # entrants (which never collide with the regular groups)
+    code_to_group = dict(base_code_to_group)
+    code_to_group.update(dict.fromkeys(new_entrants_codes, "New Entrants"))
+
+    # Per-airline share table indexed by normalized code, with every share
+    # column parsed once; later rows win for repeated codes and rows
+    # without a code are skipped. Each airline is tagged with its group.
+    # Codes are categorical, so the group lookup runs once per distinct code.
+    codes = pd.CategoricalIndex(df_air[code_col].str.strip().str.upper(), name="Code")
+    shares = pd.DataFrame(index=codes)
+    for s, col in season_col.items():
+        shares[s] = parse_percent_series(df_air[col]).to_numpy() if col is not None else 0.0
+    shares = shares[(codes != "") & ~codes.duplicated(keep="last")]
+    shares["Group"] = shares.index.map(code_to_group)
+
+    # Aggregate market shares by summing individual airline shares within
+    # each group; groups with no airlines here sum to 0
+    group_names = list(groups_local)
+    group_index = {g: i for i, g in enumerate(group_names)}
+    assigned = shares[shares["Group"].notna()]
+    group_sums = group_share_sums(
+        assigned[SEASONS].to_numpy(dtype=np.float64),
+        assigned["Group"].map(group_index).to_numpy(dtype=np.int64),
+        len(group_names),
+    )
+
+    # Calculate HHI for each season using the formula: HHI = Σ(market_share²)
+    # HHI measures market concentration on a scale of 0-10,000
+    # Higher values indicate greater concentration (less competition)
+    # Rounded once here; every output below reuses hhi_vals
+    hhi_raw = hhi_from_group_shares(group_sums)
+    hhi_vals = [round(v, 4) for v in hhi_raw.tolist()]
+
+    # One block of seasonal rows per airport, classified in one vector op
+    # (on the unrounded HHI)
+    block = pd.DataFrame({
+        "Airport": airport,
+        "Season": SEASONS,
+        "Season Name": [SEASON_NAMES[s] for s in SEASONS],
+        "HHI": hhi_vals,
+        "Market Classification": classify_hhi(hhi_raw),
+    })
+
+    # Build the airport breakdown in one pass: metadata header, market
+    # shares by airline group, then the HHI and classification rows
+    season_names = [SEASON_NAMES[s] for s in SEASONS]
+    labels = [
+        f"HHI ANALYSIS FOR {airport}",
+        f"Generated: {run_ts or datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        "",
+        "Market Share by Airline Group (%):",
+        "",
+    ]
+    out_rows = [[""] * len(SEASONS) for _ in labels]
+
+    # Market shares by airline group for each season
+    labels.extend(group_names)
+    out_rows.extend([round(v, 2) for v in row] for row in group_sums.tolist())
+
+    # Separator, HHI and classification rows
+    labels.extend(["", "HHI (Market Concentration Index)", "Market Classification"])
+    out_rows.extend([["---"] * len(SEASONS), hhi_vals, list(classify_hhi(hhi_vals))])
+
+    df_out = pd.DataFrame(out_rows, index=labels, columns=season_names)
+
+    # Save airport breakdown
+    out_path = os.path.join(OUTPUT_DIR, f"{airport}_HHI_Analysis.csv")
+    df_out.to_csv(out_path)
+
+    # Track trend
+    trend = get_market_trend(hhi_vals)
+
+    summary = {
+        "Airport": airport,
+        "Avg HHI": round(sum(hhi_vals) / len(hhi_vals), 2),
+        "Min HHI": min(hhi_vals),
+        "Max HHI": max(hhi_vals),
+        "Trend": trend
+    }
 
+    log = [
+        f"  ✓ HHI Range: {min(hhi_vals):.2f} - {max(hhi_vals):.2f}",
+        f"  ✓ Trend: {trend}",
+    ]
+    return block, summary, f"✓ Wrote detailed analysis for {airport} -> {out_path}", log
 
-# ============================================================================
-# MAIN HHI COMPUTATION FUNCTION
-# ============================================================================
 
 def compute_hhi():
     """
@@ -408,6 +617,9 @@ def compute_hhi():
     # Create output directory
     os.makedirs(OUTPUT_DIR, exist_ok=True)
 
+    # One timestamp for every report of this run
+    run_ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
     # Initialize airline groups with descriptive names
     # These groups represent different competitive segments in the German aviation market
     groups = {
@@ -420,188 +632,46 @@ def compute_hhi():
 
     # Track all existing airline codes to prevent duplicate classification
     # This ensures new entrants are only counted if they're truly new
-    existing_codes_set = set()
-    for lst in groups.values():
-        for c in lst:
-            existing_codes_set.add(c.upper())
+    existing_codes_set = frozenset(c.upper() for lst in groups.values() for c in lst)
+
+    # Invert the groups into a code -> group lookup once per run (the first
+    # group listing a code wins); each airport's shares are then tagged with
+    # a single hashed Series.map instead of per-row lookups
+    base_code_to_group = {}
+    for group_name, codes in groups.items():
+        for code in codes:
+            base_code_to_group.setdefault(code, group_name)
 
     # Data structures for output generation
-    combined_rows = []        # All airport-season HHI values
+    combined_blocks = []      # All airport-season HHI values, one frame per airport
     diagnostics = []          # Processing log messages
     airport_summaries = []    # High-level airport statistics
 
-    # Process each airport individually
-    for airport in AIRPORT_CODES:
+    # Airports are independent, so they are processed in worker processes
+    # unless AIRBERLIN_SERIAL=1 is set (useful for debugging and profiling);
+    # results come back in airport order either way
+    n_workers = min(len(AIRPORT_CODES), os.cpu_count() or 1)
+    args = ([groups] * len(AIRPORT_CODES), [existing_codes_set] * len(AIRPORT_CODES),
+            [base_code_to_group] * len(AIRPORT_CODES), [run_ts] * len(AIRPORT_CODES))
+    if os.environ.get("AIRBERLIN_SERIAL") == "1" or n_workers <= 1:
+        results = list(map(process_airport, AIRPORT_CODES, *args))
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers) as ex:
+            results = list(ex.map(process_airport, AIRPORT_CODES, *args))
+
+    for airport, (block, summary, diagnostic, log) in zip(AIRPORT_CODES, results):
         print(f"\nProcessing {airport}...")
-        
-        airport_file = os.path.join(SLOTS_DIR, f"{airport}.csv")
-        if not os.path.isfile(airport_file):
-            diagnostics.append(f"⚠ Missing airport file: {airport_file}")
-            print(f"  ⚠ Missing data file")
-            continue
-
-        try:
-            df_air = pd.read_csv(airport_file, dtype=str)
-        except Exception as e:
-            diagnostics.append(f"⚠ Error reading {airport_file}: {e}")
-            print(f"  ⚠ Error reading file: {e}")
-            continue
-
-        # Identify airline code column
-        df_air.columns = [c.strip() for c in df_air.columns]
-        code_col = None
-        for c in df_air.columns:
-            if c.strip().lower() in ("airline code", "airlinecode", "iata", "code"):
-                code_col = c
-                break
-        if code_col is None:
-            code_col = df_air.columns[0]
-
-        df_air[code_col] = df_air[code_col].astype(str).str.strip()
-        
-        # Create airline lookup
-        airline_map = {}
-        for _, r in df_air.iterrows():
-            key = str(r.get(code_col, "")).strip().upper()
-            if key:
-                airline_map[key] = r
-
-        # Process new entrants
-        ne_codes_raw = read_new_entrants_for_airport(airport)
-        new_entrants_codes = []
-        for code in ne_codes_raw:
-            if code and code.upper() not in existing_codes_set:
-                new_entrants_codes.append(code.upper())
-
-        # Create local groups including new entrants
-        groups_local = {k: list(v) for k, v in groups.items()}
-        if new_entrants_codes:
-            groups_local["New Entrants"] = new_entrants_codes
-
-        # Calculate market shares by airline group for each season
-        # This data will be used both for output display and HHI calculation
-        breakdown = {"Airline Group": []}
-        for s in SEASONS:
-            breakdown[SEASON_NAMES[s]] = []
-
-        # Track group-level percentages for HHI computation
-        group_pct_by_season = {s: {} for s in SEASONS}
-
-        # Aggregate market shares by summing individual airline shares within each group
-        for group_name, codes in groups_local.items():
-            sums = {s: 0.0 for s in SEASONS}
-            
-            for code in codes:
-                code_u = str(code).strip().upper()
-                row = airline_map.get(code_u)
-                
-                if row is None:
-                    continue
-                
-                for s in SEASONS:
-                    share_val = None
-                    # Try different column name patterns
-                    candidates = [f"Share_{s}", f"Share {s}", s, f"Share_{s}%"]
-                    for cand in candidates:
-                        if cand in df_air.columns:
-                            share_val = row.get(cand)
-                            break
-                    
-                    if share_val is None:
-                        for colname in df_air.columns:
-                            if s in colname.upper() and "SHARE" in colname.upper():
-                                share_val = row.get(colname)
-                                break
-                    
-                    pct = parse_percent(share_val)
-                    sums[s] += pct
-            
-            breakdown["Airline Group"].append(group_name)
-            for s in SEASONS:
-                breakdown[SEASON_NAMES[s]].append(round(sums[s], 2))
-                group_pct_by_season[s][group_name] = sums[s]
-
-        # Calculate HHI for each season using the formula: HHI = Σ(market_share²)
-        # HHI measures market concentration on a scale of 0-10,000
-        # Higher values indicate greater concentration (less competition)
-        hhi_by_season = {}
-        for s in SEASONS:
-            total_hhi = 0.0
-            # Sum the squared market shares across all airline groups
-            for gname, pctsum in group_pct_by_season[s].items():
-                total_hhi += (pctsum ** 2)  # Square each group's market share
-            hhi_by_season[s] = round(total_hhi, 4)
-            
-            combined_rows.append({
-                "Airport": airport,
-                "Season": s,
-                "Season Name": SEASON_NAMES[s],
-                "HHI": round(total_hhi, 4),
-                "Market Classification": get_market_classification(total_hhi)
-            })
-
-        # Create detailed breakdown DataFrame
-        df_break = pd.DataFrame(breakdown).set_index("Airline Group")
-        
-        # Add separator row
-        separator_row = pd.DataFrame({season: ["---"] for season in SEASON_NAMES.values()}, 
-                                    index=[""])
-        
-        # Add HHI row
-        hhi_row = pd.DataFrame({
-            SEASON_NAMES[s]: [hhi_by_season[s]] for s in SEASONS
-        }, index=["HHI (Market Concentration Index)"])
-        
-        # Add classification row
-        classification_row = pd.DataFrame({
-            SEASON_NAMES[s]: [get_market_classification(hhi_by_season[s])] for s in SEASONS
-        }, index=["Market Classification"])
-        
-        # Combine all sections
-        df_out = pd.concat([df_break, separator_row, hhi_row, classification_row])
-        
-        # Add metadata header
-        metadata = {
-            "Airline Group": [
-                f"HHI ANALYSIS FOR {airport}",
-                f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
-                "",
-                "Market Share by Airline Group (%):",
-                ""
-            ]
-        }
-        for season in SEASON_NAMES.values():
-            metadata[season] = ["", "", "", "", ""]
-        
-        df_metadata = pd.DataFrame(metadata).set_index("Airline Group")
-        df_out = pd.concat([df_metadata, df_out])
-        
-        # Save airport breakdown
-        out_path = os.path.join(OUTPUT_DIR, f"{airport}_HHI_Analysis.csv")
-        df_out.to_csv(out_path)
-        
-        # Track trend
-        hhi_vals = [hhi_by_season[s] for s in SEASONS]
-        trend = get_market_trend(hhi_vals)
-        
-        airport_summaries.append({
-            "Airport": airport,
-            "Avg HHI": round(sum(hhi_vals) / len(hhi_vals), 2),
-            "Min HHI": min(hhi_vals),
-            "Max HHI": max(hhi_vals),
-            "Trend": trend
-        })
-        
-        diagnostics.append(f"✓ Wrote detailed analysis for {airport} -> {out_path}")
-        print(f"  ✓ HHI Range: {min(hhi_vals):.2f} - {max(hhi_vals):.2f}")
-        print(f"  ✓ Trend: {trend}")
+        for line in log:
+            print(line)
+        diagnostics.append(diagnostic)
+        if block is not None:
+            combined_blocks.append(block)
+            airport_summaries.append(summary)
 
     # Create comprehensive summary file
     print("\n" + "=" * 80)
     print("Creating comprehensive summary...")
     
-    df_combined = pd.DataFrame(combined_rows)
-    
     # Add analysis header
     header_data = {
         "Airport": [
@@ -623,31 +693,27 @@ def compute_hhi():
         "Market Classification": [""] * 11
     }
     
+    # Header and every airport's seasonal rows are joined in a single concat
     df_header = pd.DataFrame(header_data)
-    df_combined_with_header = pd.concat([df_header, df_combined], ignore_index=True)
+    df_combined_with_header = pd.concat([df_header, *combined_blocks], ignore_index=True)
     
     combined_path = os.path.join(OUTPUT_DIR, "HHI_Summary_All_Airports.csv")
     df_combined_with_header.to_csv(combined_path, index=False)
     diagnostics.append(f"✓ Wrote comprehensive summary -> {combined_path}")
 
-    # Create airport comparison summary
-    df_summary = pd.DataFrame(airport_summaries)
+    # Create airport comparison summary from header rows plus one row per airport
     summary_path = os.path.join(OUTPUT_DIR, "Airport_HHI_Comparison.csv")
     
-    summary_header = {
-        "Airport": [
+    summary_header = [
+        {"Airport": title, "Avg HHI": "", "Min HHI": "", "Max HHI": "", "Trend": ""}
+        for title in (
             "AIRPORT COMPARISON - HHI SUMMARY",
             "Average Market Concentration Across All Seasons",
             ""
-        ],
-        "Avg HHI": [""] * 3,
-        "Min HHI": [""] * 3,
-        "Max HHI": [""] * 3,
-        "Trend": [""] * 3
-    }
+        )
+    ]
     
-    df_summary_header = pd.DataFrame(summary_header)
-    df_summary_with_header = pd.concat([df_summary_header, df_summary], ignore_index=True)
+    df_summary_with_header = pd.DataFrame(summary_header + airport_summaries)
     df_summary_with_header.to_csv(summary_path, index=False)
     diagnostics.append(f"✓ Wrote airport comparison -> {summary_path}")
 
@@ -85,9 +85,12 @@ Key Metrics:
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from loaders import read_csv_as_str
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -205,6 +208,10 @@ AIRPORT_CODES = ["DUS", "FRA", "HAM", "MUC", "STR", "SXF", "TXL"]
 # These regions represent key competitive battlegrounds post-Air Berlin
 FOCUS_REGIONS = ["WESTERN EUROPE", "EASTERN EUROPE", "NORTH AFRICA", "GULF/MIDDLE EAST"]
 
+# Region aliases: Gulf and Middle East are analysed as one destination market,
+# since they share competitive dynamics and Air Berlin's strategy there
+REGION_ALIASES = {"GULF": "GULF/MIDDLE EAST", "MIDDLE EAST": "GULF/MIDDLE EAST"}
+
 # Summer months filter: IATA summer season (April-October)
 # Ensures consistent seasonal comparison across years
 SUMMER_MONTHS = [4, 5, 6, 7, 8, 9, 10]
@@ -212,6 +219,46 @@ SUMMER_MONTHS = [4, 5, 6, 7, 8, 9, 10]
 # Analysis time period: 2015-2019 (pre- and post-Air Berlin collapse)
 YEARS = [2015, 2016, 2017, 2018, 2019]
 
+# Schedule columns used by this analysis and their parse dtypes; the reader
+# skips every other column and stores repeated labels as categoricals.
+# Month and Year are parsed as strings so blank or malformed cells can be
+# coerced and dropped instead of failing the read
+SCHEDULE_DTYPES = {
+    'Month': 'str',
+    'Year': 'str',
+    'Origin Airport': 'category',
+    'Destination Region Name': 'category',
+    'Operating Airline': 'category',
+    'Operating Airline Name': 'category',
+}
+
+# Schedule columns read with an inferred dtype: Departures stays integer when
+# the file holds whole numbers (and float otherwise), so the departure counts
+# in the result files are written exactly as before
+SCHEDULE_INFERRED_COLUMNS = ['Departures']
+
+# Integer dtypes for the date columns once invalid values are dropped
+SCHEDULE_INT_DTYPES = {
+    'Month': 'int8',
+    'Year': 'int16',
+}
+
+# Chart colors for each airline group (unknown groups are drawn in grey)
+GROUP_COLORS = {
+    'LUFTHANSA_GROUP': '#003366',
+    'AIR_BERLIN_GROUP': '#CC0000',
+    'LowCostCarrier_GROUP': '#FF9900',
+    'legacy_group': '#006633',
+    'regional_and_others': '#9966CC',
+    'NEW_ENTRANT': '#FF6699'
+}
+
+# File format of the bulk result tables (detailed_market_shares and
+# market_shares_by_group): 'csv', or 'parquet' for zstd-compressed Parquet
+# written by pyarrow, which is much faster to write and reload
+RESULT_FORMATS = ('csv', 'parquet')
+RESULT_FORMAT = os.environ.get('AIRBERLIN_RESULT_FORMAT', 'csv').strip().lower()
+
 # Directory path for new entrant files
 NEW_ENTRANT_DIR = "/mnt/user-data/uploads/slots"
 
@@ -235,14 +282,26 @@ def load_new_entrants(new_entrant_dir):
         Berlin's collapse. Their presence indicates whether slots were distributed
         to promote competition or consolidated by incumbents (primarily Lufthansa).
         Airport-specific tracking prevents double-counting across analyses.
+
+    Note:
+        Only the AIRLINE_CODE column is parsed, through the shared slot file
+        loader (pyarrow engine and Parquet cache when pyarrow is installed).
     """
     new_entrants = {}
     
+    # List the directory once instead of one stat call per airport
+    try:
+        with os.scandir(new_entrant_dir) as entries:
+            existing = {entry.name for entry in entries}
+    except OSError:
+        existing = set()
+    
     for airport in AIRPORT_CODES:
-        filepath = Path(new_entrant_dir) / f"{airport}_NEW_ENTRANT.csv"
-        if filepath.exists():
+        filename = f"{airport}_NEW_ENTRANT.csv"
+        filepath = Path(new_entrant_dir) / filename
+        if filename in existing:
             try:
-                df = pd.read_csv(filepath)
+                df = read_csv_as_str(str(filepath), usecols=['AIRLINE_CODE'])
                 # Extract airline codes for this airport
                 airline_codes = df['AIRLINE_CODE'].unique().tolist()
                 new_entrants[airport] = airline_codes
@@ -275,7 +334,6 @@ def create_airline_mapping(new_entrants):
         over new entrant classification to prevent double-counting. This ensures
         accurate HHI calculation by avoiding inflated group counts.
     """
-    airline_to_group = {}
     conflicts = []
     
     # Define groups with their names
@@ -287,92 +345,78 @@ def create_airline_mapping(new_entrants):
         ("regional_and_others", regional_and_others),
     ]
     
-    # First pass: add all regular groups
-    for group_name, group_list in groups:
-        for airline in group_list:
-            iata_code = airline['iataCode']
-            if iata_code in airline_to_group:
+    # First pass: add all regular groups as flat (code, group) pairs; a code
+    # keeps the first group it is listed in
+    pairs = [(airline['iataCode'], group_name)
+             for group_name, group_list in groups for airline in group_list]
+    airline_to_group = dict(reversed(pairs))
+    
+    # Codes listed more than once are conflicts (rare, so only then walk pairs)
+    code_counts = Counter(iata_code for iata_code, _ in pairs)
+    if len(code_counts) < len(pairs):
+        seen = set()
+        for iata_code, group_name in pairs:
+            if iata_code in seen:
                 conflicts.append({
                     'iata_code': iata_code,
                     'group1': airline_to_group[iata_code],
                     'group2': group_name
                 })
-            else:
-                airline_to_group[iata_code] = group_name
+            seen.add(iata_code)
     
     # Second pass: add new entrants (lowest priority)
     # Create airport-specific mappings for new entrants
     new_entrant_mappings = {}
     for airport, codes in new_entrants.items():
         for code in codes:
-            # Check if already in a regular group
-            if code in airline_to_group:
+            # Check if already in a regular group (one lookup per code)
+            regular_group = airline_to_group.get(code)
+            if regular_group is not None:
                 conflicts.append({
                     'iata_code': code,
                     'airport': airport,
-                    'group1': airline_to_group[code],
+                    'group1': regular_group,
                     'group2': 'NEW_ENTRANT',
-                    'resolution': f'Keeping {airline_to_group[code]} (NEW_ENTRANT has lowest priority)'
+                    'resolution': f'Keeping {regular_group} (NEW_ENTRANT has lowest priority)'
                 })
             else:
                 # Store as airport-specific new entrant
-                if airport not in new_entrant_mappings:
-                    new_entrant_mappings[airport] = []
-                new_entrant_mappings[airport].append(code)
+                new_entrant_mappings.setdefault(airport, []).append(code)
     
     return airline_to_group, new_entrant_mappings, conflicts
 
 
-def normalize_region(region_name):
-    """
-    Normalize region names to handle Gulf/Middle East consolidation.
-
-    Args:
-        region_name (str): Raw region name from schedule data
-
-    Returns:
-        str: Normalized region name
-
-    Business Logic:
-        Combines "GULF" and "MIDDLE EAST" into single category "GULF/MIDDLE EAST"
-        to match focused region definitions. This consolidation reflects similar
-        competitive dynamics and Air Berlin's operational strategy in these markets.
-    """
-    if region_name in ["GULF", "MIDDLE EAST"]:
-        return "GULF/MIDDLE EAST"
-    return region_name
-
-
-def calculate_hhi(market_shares):
-    """
-    Calculate Herfindahl-Hirschman Index from market shares.
-
-    Args:
-        market_shares (list): List of market shares as decimals (0.0-1.0)
-
-    Returns:
-        float: HHI value (0-10,000 scale)
-
-    Formula:
-        HHI = Σ(s_i)² × 10,000
-        where s_i is each firm's market share expressed as a decimal
-
-    Example:
-        market_shares = [0.50, 0.30, 0.20]
-        HHI = (0.50² + 0.30² + 0.20²) × 10,000 = (0.25 + 0.09 + 0.04) × 10,000 = 3,800
-    """
-    return sum(share ** 2 for share in market_shares) * 10000
-
-
 def load_and_filter_schedule(schedule_path):
     """
     Load schedule data and filter for relevant periods
     """
     print(f"Loading schedule data from {schedule_path}...")
-    df = pd.read_csv(schedule_path)
+    # pandas' pyarrow engine parses with multiple threads; pyarrow is optional,
+    # so fall back to the default C engine when it is not installed
+    read_kwargs = {
+        'usecols': list(SCHEDULE_DTYPES) + SCHEDULE_INFERRED_COLUMNS,
+        'dtype': SCHEDULE_DTYPES,
+    }
+    try:
+        df = pd.read_csv(schedule_path, engine='pyarrow', **read_kwargs)
+        # pyarrow keeps quoted empty fields ("") as empty strings where the C
+        # engine reads them as missing; drop that category to match
+        for col in df.select_dtypes('category').columns:
+            if '' in df[col].cat.categories:
+                df[col] = df[col].cat.remove_categories([''])
+    except (ImportError, ValueError):
+        df = pd.read_csv(schedule_path, **read_kwargs)
     
     print(f"Initial dataset size: {len(df)} rows")
     
+    # Drop rows whose Month or Year is blank or not a number, then store the
+    # rest as small integers
+    dates = df[list(SCHEDULE_INT_DTYPES)].apply(pd.to_numeric, errors='coerce')
+    valid_dates = dates.notna().all(axis=1)
+    if not valid_dates.all():
+        print(f"Dropped {(~valid_dates).sum()} rows with a missing or invalid Month/Year")
+    df = df[valid_dates].assign(**dates[valid_dates].astype(SCHEDULE_INT_DTYPES))
+    
     # Filter for summer months (April to October)
     df = df[df['Month'].isin(SUMMER_MONTHS)]
     print(f"After filtering for summer months (4-10): {len(df)} rows")
@@ -382,35 +426,46 @@ def load_and_filter_schedule(schedule_path):
     print(f"After filtering for focused airports: {len(df)} rows")
     
     # Normalize destination regions
-    df['Destination Region Normalized'] = df['Destination Region Name'].apply(normalize_region)
+    # One replace over the region categories rather than a Python call per row;
+    # merged aliases can leave the categories unsorted, so restore their order
+    regions = df['Destination Region Name'].replace(REGION_ALIASES)
+    df['Destination Region Normalized'] = regions.cat.reorder_categories(sorted(regions.cat.categories))
     
     # Filter for focused regions
     df = df[df['Destination Region Normalized'].isin(FOCUS_REGIONS)]
     print(f"After filtering for focused regions: {len(df)} rows")
     
+    # Drop categories of filtered-out rows so later groupbys and pivots only see
+    # airports, regions and airlines that remain
+    categorical = df.select_dtypes('category').columns
+    df = df.assign(**{col: df[col].cat.remove_unused_categories() for col in categorical})
+    
     return df
 
 
 def assign_airline_groups(df, airline_to_group, new_entrant_mappings):
     """
     Assign each airline to its group
+
+    Regular groups are looked up with one Series.map over the airline codes;
+    airport-specific new entrants are matched on (airport, airline) pairs
+    with a single MultiIndex.isin instead of a Python call per row.
     """
-    def get_group(row):
-        airline_code = row['Operating Airline']
-        airport = row['Origin Airport']
-        
-        # Check regular groups first
-        if airline_code in airline_to_group:
-            return airline_to_group[airline_code]
-        
-        # Check if it's a new entrant for this specific airport
-        if airport in new_entrant_mappings and airline_code in new_entrant_mappings[airport]:
-            return 'NEW_ENTRANT'
-        
-        # Not in any group
-        return None
+    # Check regular groups first
+    groups = df['Operating Airline'].map(airline_to_group).astype(object)
+    
+    # Then new entrants for the specific origin airport
+    new_entrant_pairs = [
+        (airport, code) for airport, codes in new_entrant_mappings.items() for code in codes
+    ]
+    if new_entrant_pairs:
+        is_new_entrant = pd.MultiIndex.from_arrays(
+            [df['Origin Airport'], df['Operating Airline']]
+        ).isin(new_entrant_pairs)
+        groups = groups.mask(groups.isna() & is_new_entrant, 'NEW_ENTRANT')
     
-    df['Airline_Group'] = df.apply(get_group, axis=1)
+    # Airlines in no group stay NaN
+    df['Airline_Group'] = groups
     
     # Report statistics
     total_rows = len(df)
@@ -434,49 +489,81 @@ def assign_airline_groups(df, airline_to_group, new_entrant_mappings):
     return df
 
 
+def route_labels(origins, regions):
+    """
+    Build "<AIRPORT> → <REGION>" route identifiers
+
+    Args:
+        origins (Series): Origin airport codes
+        regions (Series): Normalized destination regions, same index
+
+    Returns:
+        Series: Categorical route labels
+
+    Note:
+        Labels are formatted once per airport/region category pair and
+        indexed by the combined category codes, instead of concatenating new
+        Python strings for every row.
+    """
+    origins = origins.astype('category')
+    regions = regions.astype('category')
+    labels = [f'{origin} → {region}'
+              for origin in origins.cat.categories for region in regions.cat.categories]
+    origin_codes = origins.cat.codes.to_numpy(dtype=np.int32)
+    region_codes = regions.cat.codes.to_numpy(dtype=np.int32)
+    codes = np.where((origin_codes < 0) | (region_codes < 0), -1,
+                     origin_codes * len(regions.cat.categories) + region_codes)
+    routes = pd.Categorical.from_codes(codes, categories=labels)
+    return pd.Series(routes, index=origins.index).cat.remove_unused_categories()
+
+
 def calculate_route_hhi(df):
     """
     Calculate HHI for each route-year combination
     """
     print("\nCalculating HHI for each route-year combination...")
     
-    # Group by route, year, and airline group, sum departures
-    grouped = df.groupby([
-        'Origin Airport',
-        'Destination Region Normalized',
-        'Year',
-        'Airline_Group'
-    ])['Departures'].sum().reset_index()
-    
-    # Calculate total market departures for each route-year
-    market_totals = grouped.groupby([
-        'Origin Airport',
-        'Destination Region Normalized',
-        'Year'
-    ])['Departures'].sum().reset_index()
-    market_totals.rename(columns={'Departures': 'Total_Market_Departures'}, inplace=True)
-    
-    # Merge to get market shares
-    grouped = grouped.merge(
-        market_totals,
-        on=['Origin Airport', 'Destination Region Normalized', 'Year']
-    )
-    
-    grouped['Market_Share'] = grouped['Departures'] / grouped['Total_Market_Departures']
-    grouped['Market_Share_Squared'] = grouped['Market_Share'] ** 2
+    # Categorical keys let groupby hash integer codes instead of Python strings;
+    # observed=True keeps only the combinations that actually occur. With
+    # several categorical keys pandas returns observed groups in order of first
+    # appearance, so the per-group totals are sorted explicitly. Later
+    # aggregations run over that sorted frame and skip the sort (sort=False):
+    # first appearance is then key order.
+    df = df.astype({
+        'Origin Airport': 'category',
+        'Destination Region Normalized': 'category',
+        'Airline_Group': 'category',
+        'Year': 'int32',
+    })
+    
+    route_keys = ['Origin Airport', 'Destination Region Normalized', 'Year']
     
-    # Calculate HHI for each route-year
-    hhi_results = grouped.groupby([
-        'Origin Airport',
-        'Destination Region Normalized',
-        'Year'
-    ])['Market_Share_Squared'].sum().reset_index()
-    
-    hhi_results['HHI'] = hhi_results['Market_Share_Squared'] * 10000
-    hhi_results.drop('Market_Share_Squared', axis=1, inplace=True)
+    # Group by route, year, and airline group, sum departures
+    grouped = df.groupby(
+        route_keys + ['Airline_Group'], observed=True
+    )['Departures'].sum().sort_index().reset_index()
+    
+    # Total market departures for each route-year, broadcast back onto the
+    # group rows with transform instead of a separate aggregation and merge
+    grouped['Total_Market_Departures'] = grouped.groupby(
+        route_keys, observed=True, sort=False
+    )['Departures'].transform('sum')
+    
+    market_share = grouped['Departures'] / grouped['Total_Market_Departures']
+    grouped['Market_Share'] = market_share
+    grouped['Market_Share_Squared'] = market_share * market_share
+    
+    # Calculate HHI for each route-year. On categorical keys this is already a
+    # compiled segmented reduction over integer codes, and pandas' sum is
+    # compensated (Kahan) summation; a plain per-segment loop would change
+    # the last digits of many HHI values
+    hhi_results = grouped.groupby(
+        route_keys, observed=True, sort=False
+    )['Market_Share_Squared'].sum().mul(10000).rename('HHI').reset_index()
     
     # Add route identifier
-    hhi_results['Route'] = hhi_results['Origin Airport'] + ' → ' + hhi_results['Destination Region Normalized']
+    for frame in (hhi_results, grouped):
+        frame['Route'] = route_labels(frame['Origin Airport'], frame['Destination Region Normalized'])
     
     return hhi_results, grouped
 
@@ -485,28 +572,82 @@ def create_detailed_analysis(grouped_df):
     """
     Create detailed breakdown of market shares by group for each route-year
     """
-    detailed = grouped_df.pivot_table(
-        index=['Origin Airport', 'Destination Region Normalized', 'Year', 'Route'],
-        columns='Airline_Group',
-        values=['Departures', 'Market_Share'],
-        fill_value=0
-    )
+    # Each route-year-group appears once in grouped_df, so a groupby sum
+    # unstacked on the group gives the pivot without pivot_table's machinery.
+    # unstack orders the groups by first appearance; sort them as
+    # pivot_table did so the CSV columns keep their order
+    detailed = grouped_df.groupby(
+        ['Origin Airport', 'Destination Region Normalized', 'Year', 'Route', 'Airline_Group'],
+        observed=True
+    )[['Departures', 'Market_Share']].sum().unstack('Airline_Group').sort_index(axis=1)
+    
+    # Missing groups count as zero; like pivot_table's fill_value, whole-number
+    # columns are stored as integers
+    detailed = detailed.fillna(0, downcast='infer')
     
     # Flatten column names
-    detailed.columns = [f'{col[1]}_{col[0]}' for col in detailed.columns]
+    detailed.columns = [f'{group}_{value}' for value, group in detailed.columns]
     detailed = detailed.reset_index()
     
     # Add route column if not exists
     if 'Route' not in detailed.columns:
-        detailed['Route'] = detailed['Origin Airport'] + ' → ' + detailed['Destination Region Normalized']
+        detailed['Route'] = route_labels(detailed['Origin Airport'], detailed['Destination Region Normalized'])
     
     return detailed
 
 
+@lru_cache(maxsize=None)
+def _group_colors(groups):
+    return [GROUP_COLORS.get(group, '#CCCCCC') for group in groups]
+
+
+def group_color_list(groups):
+    """
+    Colors for a sequence of airline groups, in the same order
+
+    Note:
+        Charts draw the same handful of group sets over and over (every route
+        has nearly the same groups), so each distinct set is resolved once.
+    """
+    return list(_group_colors(tuple(groups)))
+
+
+def _init_chart_worker(rc_params):
+    # Workers draw off-screen with the parent's styling (e.g. seaborn's grid)
+    import matplotlib.pyplot as plt
+    plt.switch_backend('Agg')
+    plt.rcParams.update(rc_params)
+
+
+def _map_charts(render, *iterables):
+    """
+    Render independent charts, in worker processes when more than one core is
+    available and AIRBERLIN_SERIAL=1 is not set
+
+    Returns:
+        list: render's return values, in input order
+    """
+    import matplotlib.pyplot as plt
+    n_workers = min(len(iterables[0]), os.cpu_count() or 1)
+    if os.environ.get('AIRBERLIN_SERIAL') == '1' or n_workers <= 1:
+        return list(map(render, *iterables))
+    rc_params = {key: value for key, value in plt.rcParams.items() if key != 'backend'}
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_chart_worker,
+                             initargs=(rc_params,)) as ex:
+        return list(ex.map(render, *iterables))
+
+
 def create_visualizations(hhi_results, output_dir):
     """
     Create visualizations of HHI trends
+
+    Note:
+        matplotlib and seaborn are imported here rather than at module level,
+        so runs that only need the CSV results never pay for importing them.
     """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     print("\nCreating visualizations...")
     
     # Set style
@@ -546,113 +687,102 @@ def create_visualizations(hhi_results, output_dir):
             ax.set_title(route, fontsize=10)
     
     plt.tight_layout()
-    plt.savefig(f'{output_dir}/hhi_trends_all_routes.png', dpi=300, bbox_inches='tight')
+    # The 25x28 inch grid is saved at screen resolution with light PNG
+    # compression; at 300 dpi it is a ~250 megapixel raster that dominates
+    # memory use and save time
+    plt.savefig(f'{output_dir}/hhi_trends_all_routes.png', dpi=150, bbox_inches='tight',
+                pil_kwargs={'optimize': False, 'compress_level': 1})
     print(f"Saved: {output_dir}/hhi_trends_all_routes.png")
     plt.close()
     
     # Create individual charts for each airport
-    for airport in AIRPORT_CODES:
-        airport_data = hhi_results[hhi_results['Origin Airport'] == airport]
-        
-        if len(airport_data) == 0:
-            continue
-        
-        fig, ax = plt.subplots(figsize=(12, 7))
-        
-        for region in FOCUS_REGIONS:
-            region_data = airport_data[airport_data['Destination Region Normalized'] == region].sort_values('Year')
-            if len(region_data) > 0:
-                ax.plot(region_data['Year'], region_data['HHI'], 
-                       marker='o', linewidth=2, markersize=8, label=region)
-        
-        ax.set_title(f'HHI Trends for {airport} Routes (2015-2019)', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Year', fontsize=12)
-        ax.set_ylabel('HHI', fontsize=12)
-        ax.legend(loc='best', fontsize=10)
-        ax.grid(True, alpha=0.3)
-        ax.set_ylim(0, 10000)
-        
-        # Add HHI threshold lines
-        ax.axhline(y=1500, color='g', linestyle='--', alpha=0.5, label='Unconcentrated (<1500)')
-        ax.axhline(y=2500, color='orange', linestyle='--', alpha=0.5, label='Moderate (1500-2500)')
-        
-        plt.tight_layout()
-        plt.savefig(f'{output_dir}/hhi_trends_{airport}.png', dpi=300, bbox_inches='tight')
-        print(f"Saved: {output_dir}/hhi_trends_{airport}.png")
-        plt.close()
+    airports = [a for a in AIRPORT_CODES if (hhi_results['Origin Airport'] == a).any()]
+    airport_frames = [hhi_results[hhi_results['Origin Airport'] == a] for a in airports]
+    for path in _map_charts(render_airport_chart, airports, airport_frames, [output_dir] * len(airports)):
+        print(f"Saved: {path}")
+
+
+def render_airport_chart(airport, airport_data, output_dir):
+    """
+    Draw the HHI trend chart of one origin airport, one line per region
+
+    Returns:
+        str: Path of the saved PNG file
+    """
+    import matplotlib.pyplot as plt
+    
+    fig, ax = plt.subplots(figsize=(12, 7))
+    
+    for region in FOCUS_REGIONS:
+        region_data = airport_data[airport_data['Destination Region Normalized'] == region].sort_values('Year')
+        if len(region_data) > 0:
+            ax.plot(region_data['Year'], region_data['HHI'], 
+                   marker='o', linewidth=2, markersize=8, label=region)
+    
+    ax.set_title(f'HHI Trends for {airport} Routes (2015-2019)', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('HHI', fontsize=12)
+    ax.legend(loc='best', fontsize=10)
+    ax.grid(True, alpha=0.3)
+    ax.set_ylim(0, 10000)
+    
+    # Add HHI threshold lines
+    ax.axhline(y=1500, color='g', linestyle='--', alpha=0.5, label='Unconcentrated (<1500)')
+    ax.axhline(y=2500, color='orange', linestyle='--', alpha=0.5, label='Moderate (1500-2500)')
+    
+    plt.tight_layout()
+    path = f'{output_dir}/hhi_trends_{airport}.png'
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
+def mean_contribution_by(contributions, dimension):
+    """
+    Average HHI contribution (Market Share²) of each airline group per value
+    of dimension, as a (dimension x group) frame with missing groups as 0
+    """
+    return contributions.groupby(
+        [dimension, 'Airline_Group'], observed=True
+    )['Market_Share_Squared'].mean().unstack(fill_value=0)
 
 
 def create_hhi_contribution_charts(grouped_df, output_dir):
     """
     Create bar charts showing HHI contribution (Market Share²) by airline group
     """
+    import matplotlib.pyplot as plt
+    
     print("\nCreating HHI contribution bar charts...")
     
     # Get unique combinations
     routes = grouped_df['Route'].unique()
     years = sorted(grouped_df['Year'].unique())
     
-    # Color mapping for airline groups
-    group_colors = {
-        'LUFTHANSA_GROUP': '#003366',
-        'AIR_BERLIN_GROUP': '#CC0000',
-        'LowCostCarrier_GROUP': '#FF9900',
-        'legacy_group': '#006633',
-        'regional_and_others': '#9966CC',
-        'NEW_ENTRANT': '#FF6699'
-    }
-    
     # 1. Create bar chart for each route showing HHI contribution over years
     print("  Creating route-specific HHI contribution charts...")
-    for route in sorted(routes):
-        route_data = grouped_df[grouped_df['Route'] == route].copy()
-        
-        if len(route_data) == 0:
-            continue
-        
-        # Pivot to get groups as columns
-        pivot_data = route_data.pivot_table(
-            index='Year',
-            columns='Airline_Group',
-            values='Market_Share_Squared',
-            fill_value=0
-        )
-        
-        # Create stacked bar chart
-        fig, ax = plt.subplots(figsize=(12, 7))
-        
-        # Get colors for groups present in this route
-        colors = [group_colors.get(col, '#CCCCCC') for col in pivot_data.columns]
-        
-        pivot_data.plot(kind='bar', stacked=True, ax=ax, color=colors, width=0.7)
-        
-        ax.set_title(f'HHI Contribution by Airline Group - {route}', fontsize=14, fontweight='bold')
-        ax.set_xlabel('Year', fontsize=12)
-        ax.set_ylabel('HHI Contribution (Market Share²)', fontsize=12)
-        ax.legend(title='Airline Group', bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
-        ax.grid(True, alpha=0.3, axis='y')
-        
-        # Format y-axis to show as contribution to 10000 scale
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x*10000:.0f}'))
-        
-        plt.xticks(rotation=0)
-        plt.tight_layout()
-        
-        # Safe filename (replace special characters)
-        safe_route = route.replace('→', 'to').replace('/', '_').replace(' ', '_')
-        plt.savefig(f'{output_dir}/hhi_contribution_{safe_route}.png', dpi=300, bbox_inches='tight')
-        plt.close()
+    route_names = sorted(routes)
+    route_frames = [grouped_df[grouped_df['Route'] == route] for route in route_names]
+    route_paths = _map_charts(render_route_contribution_chart, route_names, route_frames,
+                              [output_dir] * len(route_names))
+    n_saved = sum(path is not None for path in route_paths)
     
-    print(f"  Saved route-specific charts to {output_dir}/hhi_contribution_*.png")
+    print(f"  Saved {n_saved} route-specific charts to {output_dir}/hhi_contribution_*.png")
     
     # 2. Create summary chart showing average HHI contribution by group across all routes
     print("  Creating overall HHI contribution summary chart...")
     
+    # The summary and comparison charts only need the keys and contributions,
+    # so they aggregate one narrow frame; each comparison is a single groupby
+    # unstacked straight into (dimension x group) form
+    contributions = grouped_df[['Year', 'Origin Airport', 'Destination Region Normalized',
+                                'Airline_Group', 'Market_Share_Squared']]
+    
     # Calculate average contribution by group across all routes and years
-    avg_contribution = grouped_df.groupby('Airline_Group')['Market_Share_Squared'].mean().sort_values(ascending=False)
+    avg_contribution = contributions.groupby('Airline_Group', observed=True)['Market_Share_Squared'].mean().sort_values(ascending=False)
     
     fig, ax = plt.subplots(figsize=(12, 7))
-    colors_list = [group_colors.get(group, '#CCCCCC') for group in avg_contribution.index]
+    colors_list = group_color_list(avg_contribution.index)
     
     bars = ax.bar(range(len(avg_contribution)), avg_contribution.values * 10000, color=colors_list, width=0.6)
     ax.set_xticks(range(len(avg_contribution)))
@@ -677,11 +807,10 @@ def create_hhi_contribution_charts(grouped_df, output_dir):
     # 3. Create comparison chart by year
     print("  Creating year-by-year HHI contribution comparison...")
     
-    year_group_contribution = grouped_df.groupby(['Year', 'Airline_Group'])['Market_Share_Squared'].mean().reset_index()
-    pivot_year = year_group_contribution.pivot(index='Year', columns='Airline_Group', values='Market_Share_Squared').fillna(0)
+    pivot_year = mean_contribution_by(contributions, 'Year')
     
     fig, ax = plt.subplots(figsize=(14, 8))
-    colors = [group_colors.get(col, '#CCCCCC') for col in pivot_year.columns]
+    colors = group_color_list(pivot_year.columns)
     
     pivot_year.plot(kind='bar', ax=ax, color=colors, width=0.7)
     
@@ -702,11 +831,10 @@ def create_hhi_contribution_charts(grouped_df, output_dir):
     # 4. Create comparison chart by airport
     print("  Creating airport-by-airport HHI contribution comparison...")
     
-    airport_group_contribution = grouped_df.groupby(['Origin Airport', 'Airline_Group'])['Market_Share_Squared'].mean().reset_index()
-    pivot_airport = airport_group_contribution.pivot(index='Origin Airport', columns='Airline_Group', values='Market_Share_Squared').fillna(0)
+    pivot_airport = mean_contribution_by(contributions, 'Origin Airport')
     
     fig, ax = plt.subplots(figsize=(14, 8))
-    colors = [group_colors.get(col, '#CCCCCC') for col in pivot_airport.columns]
+    colors = group_color_list(pivot_airport.columns)
     
     pivot_airport.plot(kind='bar', ax=ax, color=colors, width=0.7)
     
@@ -727,11 +855,10 @@ def create_hhi_contribution_charts(grouped_df, output_dir):
     # 5. Create comparison chart by region
     print("  Creating region-by-region HHI contribution comparison...")
     
-    region_group_contribution = grouped_df.groupby(['Destination Region Normalized', 'Airline_Group'])['Market_Share_Squared'].mean().reset_index()
-    pivot_region = region_group_contribution.pivot(index='Destination Region Normalized', columns='Airline_Group', values='Market_Share_Squared').fillna(0)
+    pivot_region = mean_contribution_by(contributions, 'Destination Region Normalized')
     
     fig, ax = plt.subplots(figsize=(14, 8))
-    colors = [group_colors.get(col, '#CCCCCC') for col in pivot_region.columns]
+    colors = group_color_list(pivot_region.columns)
     
     pivot_region.plot(kind='bar', ax=ax, color=colors, width=0.7)
     
@@ -752,6 +879,56 @@ def create_hhi_contribution_charts(grouped_df, output_dir):
     print("\nHHI contribution charts completed!")
 
 
+def render_route_contribution_chart(route, route_data, output_dir):
+    """
+    Draw the stacked HHI contribution chart of one route, one bar per year
+
+    Returns:
+        str or None: Path of the saved PNG file, or None if the route has no
+                     data and no chart was drawn
+    """
+    import matplotlib.pyplot as plt
+    
+    if len(route_data) == 0:
+        return None
+    
+    # Pivot to get groups as columns
+    pivot_data = route_data.pivot_table(
+        index='Year',
+        columns='Airline_Group',
+        values='Market_Share_Squared',
+        fill_value=0,
+        observed=True
+    )
+    
+    # Create stacked bar chart
+    fig, ax = plt.subplots(figsize=(12, 7))
+    
+    # Get colors for groups present in this route
+    colors = group_color_list(pivot_data.columns)
+    
+    pivot_data.plot(kind='bar', stacked=True, ax=ax, color=colors, width=0.7)
+    
+    ax.set_title(f'HHI Contribution by Airline Group - {route}', fontsize=14, fontweight='bold')
+    ax.set_xlabel('Year', fontsize=12)
+    ax.set_ylabel('HHI Contribution (Market Share²)', fontsize=12)
+    ax.legend(title='Airline Group', bbox_to_anchor=(1.05, 1), loc='upper left', fontsize=9)
+    ax.grid(True, alpha=0.3, axis='y')
+    
+    # Format y-axis to show as contribution to 10000 scale
+    ax.yaxis.set_major_formatter(plt.FuncFormatter(lambda x, p: f'{x*10000:.0f}'))
+    
+    plt.xticks(rotation=0)
+    plt.tight_layout()
+    
+    # Safe filename (replace special characters)
+    safe_route = route.replace('→', 'to').replace('/', '_').replace(' ', '_')
+    path = f'{output_dir}/hhi_contribution_{safe_route}.png'
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+    return path
+
+
 def generate_summary_statistics(hhi_results):
     """
     Generate summary statistics for HHI analysis
@@ -764,22 +941,59 @@ def generate_summary_statistics(hhi_results):
             'Max HHI': hhi_results['HHI'].max(),
             'Std Dev': hhi_results['HHI'].std()
         },
-        'By Year': hhi_results.groupby('Year')['HHI'].agg(['mean', 'median', 'min', 'max']).to_dict(),
-        'By Airport': hhi_results.groupby('Origin Airport')['HHI'].agg(['mean', 'median', 'count']).to_dict(),
-        'By Region': hhi_results.groupby('Destination Region Normalized')['HHI'].agg(['mean', 'median', 'count']).to_dict()
+        'By Year': hhi_results.groupby('Year', observed=True)['HHI'].agg(['mean', 'median', 'min', 'max']).to_dict(),
+        'By Airport': hhi_results.groupby('Origin Airport', observed=True)['HHI'].agg(['mean', 'median', 'count']).to_dict(),
+        'By Region': hhi_results.groupby('Destination Region Normalized', observed=True)['HHI'].agg(['mean', 'median', 'count']).to_dict()
     }
     
     return summary
 
 
+def save_result_table(df, output_dir, name):
+    """
+    Save a bulk result table in the configured RESULT_FORMAT
+
+    Returns:
+        str: Path of the written file
+    """
+    if RESULT_FORMAT == 'parquet':
+        path = f'{output_dir}/{name}.parquet'
+        df.to_parquet(path, engine='pyarrow', compression='zstd', index=False)
+    elif RESULT_FORMAT == 'csv':
+        path = f'{output_dir}/{name}.csv'
+        df.to_csv(path, index=False)
+    else:
+        raise ValueError(f'Unknown result format: {RESULT_FORMAT!r}')
+    print(f"Saved: {path}")
+    return path
+
+
 # ============================================================================
 # MAIN EXECUTION
 # ============================================================================
 
-def main(schedule_path, new_entrant_dir, output_dir):
+def main(schedule_path, new_entrant_dir, output_dir, skip_plots=False):
     """
     Main execution function
+
+    Args:
+        schedule_path (str): Path to schedule.csv
+        new_entrant_dir (str): Directory containing <AIRPORT>_NEW_ENTRANT.csv files
+        output_dir (str): Directory for result files
+        skip_plots (bool): Only write the CSV results, skipping steps 9-10
+
+    Note:
+        Raises ValueError if AIRBERLIN_RESULT_FORMAT is not one of
+        RESULT_FORMATS.
     """
+    # Reject an unknown result format before any work, instead of silently
+    # writing CSV
+    if RESULT_FORMAT not in RESULT_FORMATS:
+        raise ValueError(
+            f'AIRBERLIN_RESULT_FORMAT must be one of {", ".join(RESULT_FORMATS)}, '
+            f'got {RESULT_FORMAT!r}'
+        )
+    
     print("="*80)
     print("HHI MARKET CONCENTRATION ANALYSIS")
     print("="*80)
@@ -837,10 +1051,6 @@ def main(schedule_path, new_entrant_dir, output_dir):
     print("STEP 6: Creating Detailed Market Share Analysis")
     print("="*80)
     
-    # Add Route column to grouped_df if not exists
-    if 'Route' not in grouped_df.columns:
-        grouped_df['Route'] = grouped_df['Origin Airport'] + ' → ' + grouped_df['Destination Region Normalized']
-    
     detailed_df = create_detailed_analysis(grouped_df)
     
     # Step 7: Generate summary statistics
@@ -864,37 +1074,35 @@ def main(schedule_path, new_entrant_dir, output_dir):
     print(f"Saved: {hhi_output_path}")
     
     # Save detailed market share analysis
-    detailed_output_path = f'{output_dir}/detailed_market_shares.csv'
-    detailed_df.to_csv(detailed_output_path, index=False)
-    print(f"Saved: {detailed_output_path}")
+    save_result_table(detailed_df, output_dir, 'detailed_market_shares')
     
     # Save market share by group
-    market_share_path = f'{output_dir}/market_shares_by_group.csv'
-    grouped_df.to_csv(market_share_path, index=False)
-    print(f"Saved: {market_share_path}")
+    save_result_table(grouped_df, output_dir, 'market_shares_by_group')
     
     # Create pivot table for easier viewing
     pivot_hhi = hhi_results.pivot_table(
         index='Route',
         columns='Year',
         values='HHI',
-        fill_value=0
+        fill_value=0,
+        observed=True
     ).reset_index()
     pivot_output_path = f'{output_dir}/hhi_pivot_table.csv'
     pivot_hhi.to_csv(pivot_output_path, index=False)
     print(f"Saved: {pivot_output_path}")
     
-    # Step 9: Create visualizations
-    print("\n" + "="*80)
-    print("STEP 9: Creating Visualizations")
-    print("="*80)
-    create_visualizations(hhi_results, output_dir)
-    
-    # Step 10: Create HHI contribution charts
-    print("\n" + "="*80)
-    print("STEP 10: Creating HHI Contribution Bar Charts")
-    print("="*80)
-    create_hhi_contribution_charts(grouped_df, output_dir)
+    if not skip_plots:
+        # Step 9: Create visualizations
+        print("\n" + "="*80)
+        print("STEP 9: Creating Visualizations")
+        print("="*80)
+        create_visualizations(hhi_results, output_dir)
+        
+        # Step 10: Create HHI contribution charts
+        print("\n" + "="*80)
+        print("STEP 10: Creating HHI Contribution Bar Charts")
+        print("="*80)
+        create_hhi_contribution_charts(grouped_df, output_dir)
     
     print("\n" + "="*80)
     print("ANALYSIS COMPLETE!")
@@ -906,15 +1114,16 @@ def main(schedule_path, new_entrant_dir, output_dir):
     print("    2. hhi_pivot_table.csv - HHI values in pivot format (routes x years)")
     print("    3. detailed_market_shares.csv - Detailed market share breakdown by group")
     print("    4. market_shares_by_group.csv - Raw market share data")
-    print("\n  HHI Trend Visualizations:")
-    print("    5. hhi_trends_all_routes.png - Grid visualization of all routes")
-    print("    6. hhi_trends_<AIRPORT>.png - Individual charts for each airport (7 files)")
-    print("\n  HHI Contribution Bar Charts:")
-    print("    7. hhi_contribution_<ROUTE>.png - HHI contribution by group for each route (35 files)")
-    print("    8. hhi_contribution_summary_all_routes.png - Average contribution across all routes")
-    print("    9. hhi_contribution_by_year.png - Contribution by group per year")
-    print("   10. hhi_contribution_by_airport.png - Contribution by group per airport")
-    print("   11. hhi_contribution_by_region.png - Contribution by group per region")
+    if not skip_plots:
+        print("\n  HHI Trend Visualizations:")
+        print("    5. hhi_trends_all_routes.png - Grid visualization of all routes")
+        print("    6. hhi_trends_<AIRPORT>.png - Individual charts for each airport (7 files)")
+        print("\n  HHI Contribution Bar Charts:")
+        print("    7. hhi_contribution_<ROUTE>.png - HHI contribution by group for each route (35 files)")
+        print("    8. hhi_contribution_summary_all_routes.png - Average contribution across all routes")
+        print("    9. hhi_contribution_by_year.png - Contribution by group per year")
+        print("   10. hhi_contribution_by_airport.png - Contribution by group per airport")
+        print("   11. hhi_contribution_by_region.png - Contribution by group per region")
     
     return hhi_results, detailed_df, summary_stats
 
@@ -924,6 +1133,8 @@ if __name__ == "__main__":
     SCHEDULE_PATH = "schedule.csv"
     NEW_ENTRANT_DIR = "slots"
     OUTPUT_DIR = "Result4"
+    SKIP_PLOTS = os.environ.get('AIRBERLIN_SKIP_PLOTS') == '1'
     
     # Run analysis
-    hhi_results, detailed_df, summary_stats = main(SCHEDULE_PATH, NEW_ENTRANT_DIR, OUTPUT_DIR)
\ No newline at end of file
+    hhi_results, detailed_df, summary_stats = main(SCHEDULE_PATH, NEW_ENTRANT_DIR, OUTPUT_DIR,
+                                                   skip_plots=SKIP_PLOTS)
\ No newline at end of file
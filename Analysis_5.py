@@ -100,8 +100,10 @@ Limitations:
 ===============================================================================
 """
 
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from loaders import read_csv_as_str, read_csv_columns
 
 # ============================================================================
 # CONFIGURATION PARAMETERS
@@ -125,6 +127,12 @@ FOCUS_AIRPORTS = {"DUS", "FRA", "HAM", "MUC", "STR", "SXF", "TXL"}
 # Note: GULF and MIDDLE EAST will be normalized to "GULF & MIDDLE EAST"
 FOCUS_REGIONS = {"WESTERN EUROPE", "EASTERN EUROPE", "NORTH AFRICA", "GULF", "MIDDLE EAST"}
 
+# Region aliases consolidated into one market
+REGION_ALIASES = {"GULF": "GULF & MIDDLE EAST", "MIDDLE EAST": "GULF & MIDDLE EAST"}
+
+# Focus regions after normalization (GULF and MIDDLE EAST consolidated)
+NORMALIZED_FOCUS_REGIONS = frozenset({"WESTERN EUROPE", "EASTERN EUROPE", "NORTH AFRICA", "GULF & MIDDLE EAST"})
+
 # ============================================================================
 # AIRLINE GROUP DEFINITIONS (IATA Codes)
 # ============================================================================
@@ -157,19 +165,39 @@ AIR_BERLIN_GROUP_CODES = {
     "OE"    # Laudamotion
 }
 
+# Group labels, in category code order (AB = 0, LH = 1, everyone else = 2)
+#   - Air Berlin Group: Track capacity exit from the market
+#   - Lufthansa Group: Measure capacity expansion into AB routes
+#   - OTHER: All other airlines (LCCs, legacy carriers, etc.)
+GROUP_COLUMNS = ["AIR_BERLIN_GROUP", "LUFTHANSA_GROUP", "OTHER"]
+
 # ============================================================================
 # DATA LOADING AND PREPROCESSING
 # ============================================================================
 
-# Load schedule data (all flights)
-df = pd.read_csv(CSV_PATH, dtype=str)
+# Columns this analysis reads from the schedule (any others are not parsed)
+SCHEDULE_COLUMNS = [
+    "Year", "Departures", "Origin Airport", "Destination Airport",
+    "Origin Region Name", "Destination Region Name", "Operating Airline",
+]
+
+# Map the needed columns to their names in the file, which may carry
+# surrounding whitespace
+header = read_csv_columns(str(CSV_PATH))
+usecols = [c for c in header if c.strip() in SCHEDULE_COLUMNS]
+
+# Load schedule data (all flights), as strings so malformed values are
+# coerced below instead of failing the parse
+# The shared loader uses pyarrow's multi-threaded reader when installed and
+# keeps a Parquet copy in the cache directory, so later runs skip the CSV
+df = read_csv_as_str(str(CSV_PATH), usecols=usecols)
 
 # Normalize column names (strip whitespace for consistent access)
 df.columns = [c.strip() for c in df.columns]
 
 # Convert Year to integer for chronological operations
 if "Year" in df.columns:
-    df["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int64")
+    df["Year"] = pd.to_numeric(df["Year"], errors="coerce").astype("Int16")
 else:
     df["Year"] = pd.NA
 
@@ -181,15 +209,15 @@ df["Departures"] = pd.to_numeric(df.get("Departures", 0), errors="coerce").filln
 # HELPER FUNCTIONS
 # ============================================================================
 
-def normalize_region(region_name):
+def normalize_regions(region_names):
     """
-    Normalize region names to consolidate Gulf and Middle East.
+    Normalize region names: strip, uppercase and consolidate Gulf and Middle East.
 
     Args:
-        region_name (str): Raw region name from schedule data
+        region_names (Series): Raw region names (missing values stay missing)
 
     Returns:
-        str: Normalized region name (uppercase, stripped, consolidated)
+        Series: Normalized region names
 
     Business Logic:
         GULF and MIDDLE EAST are combined into "GULF & MIDDLE EAST" because:
@@ -197,12 +225,7 @@ def normalize_region(region_name):
         - Competitive dynamics are comparable (premium long-haul connections)
         - Prevents artificial route fragmentation in analysis
     """
-    if pd.isna(region_name):
-        return region_name
-    region_name = str(region_name).strip().upper()
-    if region_name in {"GULF", "MIDDLE EAST"}:
-        return "GULF & MIDDLE EAST"
-    return region_name
+    return region_names.str.strip().str.upper().replace(REGION_ALIASES)
 
 # ============================================================================
 # DATA CLEANING AND NORMALIZATION
@@ -218,45 +241,46 @@ for col in ["Origin Airport", "Destination Airport", "Origin Region Name", "Dest
 df["Origin Airport"] = df["Origin Airport"].astype(str).str.strip().str.upper()
 df["Destination Airport"] = df["Destination Airport"].astype(str).str.strip().str.upper()
 
-# Normalize region names using consolidation function
-df["Origin Region Name"] = df["Origin Region Name"].apply(normalize_region)
-df["Destination Region Name"] = df["Destination Region Name"].apply(normalize_region)
-
-# Create normalized focus regions set (includes "GULF & MIDDLE EAST" consolidation)
-NORMALIZED_FOCUS_REGIONS = set(normalize_region(r) for r in FOCUS_REGIONS)
+# Normalize region names using vectorized string operations
+df["Origin Region Name"] = normalize_regions(df["Origin Region Name"])
+df["Destination Region Name"] = normalize_regions(df["Destination Region Name"])
 
 # ============================================================================
 # ENDPOINT RESOLUTION LOGIC
 # ============================================================================
 
-def resolve_endpoint(airport_code, region_name):
+# Endpoint lookup tables: focus airports and regions map to themselves,
+# anything else is missing
+AIRPORT_ENDPOINTS = {airport: airport for airport in FOCUS_AIRPORTS}
+REGION_ENDPOINTS = {region: region for region in NORMALIZED_FOCUS_REGIONS}
+
+
+def resolve_endpoints(airport_codes, region_names):
     """
-    Resolve route endpoint to either a focused airport or focused region.
+    Resolve route endpoints to either a focused airport or focused region.
 
     Args:
-        airport_code (str): Three-letter IATA airport code
-        region_name (str): Normalized region name
+        airport_codes (Series): Normalized (stripped, uppercase) IATA airport codes
+        region_names (Series): Normalized region names, same index
 
     Returns:
-        str or None: Resolved endpoint identifier (airport code or region name)
-                     Returns None if neither is in focused sets
+        Series: Resolved endpoint identifiers (airport code or region name)
+                NA where neither is in focused sets
 
     Priority Logic:
         1. If airport_code is in FOCUS_AIRPORTS → return airport_code
         2. Else if region_name is in NORMALIZED_FOCUS_REGIONS → return region_name
-        3. Else → return None (endpoint not in scope of analysis)
+        3. Else → NA (endpoint not in scope of analysis)
 
     Business Rationale:
         Airport-level specificity is preferred when available, but regional
         aggregation captures Air Berlin's network breadth beyond point-to-point routes.
+
+    Note:
+        Works on whole columns with two dict lookups (Series.map) instead of
+        a Python call per row.
     """
-    airport_code = (str(airport_code).strip().upper() if pd.notna(airport_code) else "")
-    if airport_code in FOCUS_AIRPORTS:
-        return airport_code
-    # region_name already normalized
-    if pd.notna(region_name) and region_name in NORMALIZED_FOCUS_REGIONS:
-        return region_name
-    return None
+    return airport_codes.map(AIRPORT_ENDPOINTS).fillna(region_names.map(REGION_ENDPOINTS))
 
 # ============================================================================
 # ROUTE FILTERING AND CLASSIFICATION
@@ -264,50 +288,70 @@ def resolve_endpoint(airport_code, region_name):
 
 # Add resolved endpoints to the dataframe
 # Each row now has Origin_Endpoint and Destination_Endpoint (airport or region)
-df["Origin_Endpoint"] = df.apply(lambda r: resolve_endpoint(r.get("Origin Airport"), r.get("Origin Region Name")), axis=1)
-df["Destination_Endpoint"] = df.apply(lambda r: resolve_endpoint(r.get("Destination Airport"), r.get("Destination Region Name")), axis=1)
+df["Origin_Endpoint"] = resolve_endpoints(df["Origin Airport"], df["Origin Region Name"])
+df["Destination_Endpoint"] = resolve_endpoints(df["Destination Airport"], df["Destination Region Name"])
 
 # Filter to only routes where BOTH endpoints are in focus sets
 # This ensures we're analyzing Air Berlin's core strategic network
-filtered = df[df["Origin_Endpoint"].notna() & df["Destination_Endpoint"].notna()].copy()
+# Only the columns used below are taken, so the unused ones are never copied
+filtered = df.loc[
+    df["Origin_Endpoint"].notna() & df["Destination_Endpoint"].notna(),
+    ["Year", "Departures", "Origin_Endpoint", "Destination_Endpoint", "Operating Airline"],
+]
 
 print(f"\nFiltered to {len(filtered):,} rows where endpoints belong to focus airports/regions")
 print(f"Focus Airports: {', '.join(sorted(FOCUS_AIRPORTS))}")
 print(f"Focus Regions: {', '.join(sorted(FOCUS_REGIONS))}\n")
 
-# Create route identifier: "ORIGIN→DESTINATION" format
-filtered["Route"] = filtered["Origin_Endpoint"].astype(str) + "->" + filtered["Destination_Endpoint"].astype(str)
-
 # Normalize Operating Airline codes for group matching
 filtered["Operating Airline"] = filtered["Operating Airline"].astype(str).str.strip().str.upper()
 
-# ============================================================================
-# AIRLINE GROUP CLASSIFICATION
-# ============================================================================
+# Store the low-cardinality key columns as categoricals so grouping works
+# on integer codes instead of hashing strings
+for col in ["Operating Airline", "Origin_Endpoint", "Destination_Endpoint"]:
+    filtered[col] = filtered[col].astype("category")
+
 
-def label_group(iata_code):
+def route_labels(origins, destinations):
     """
-    Classify airline by group membership.
+    Build "ORIGIN->DESTINATION" route identifiers.
 
     Args:
-        iata_code (str): Airline IATA code
+        origins (Series): Categorical origin endpoints
+        destinations (Series): Categorical destination endpoints, same index
 
     Returns:
-        str: Group label ("AIR_BERLIN_GROUP", "LUFTHANSA_GROUP", or "OTHER")
+        Series: Categorical route labels, categories in sorted order
 
-    Business Logic:
-        - Air Berlin Group: Track capacity exit from the market
-        - Lufthansa Group: Measure capacity expansion into AB routes
-        - OTHER: All other airlines (LCCs, legacy carriers, etc.)
+    Note:
+        Labels are formatted once per endpoint category pair and indexed by
+        the combined category codes, instead of concatenating new Python
+        strings for every row.
     """
-    if iata_code in AIR_BERLIN_GROUP_CODES:
-        return "AIR_BERLIN_GROUP"
-    if iata_code in LUFTHANSA_GROUP_CODES:
-        return "LUFTHANSA_GROUP"
-    return "OTHER"
+    labels = [f"{origin}->{destination}"
+              for origin in origins.cat.categories for destination in destinations.cat.categories]
+    codes = (origins.cat.codes.to_numpy(dtype=np.int32) * len(destinations.cat.categories)
+             + destinations.cat.codes.to_numpy(dtype=np.int32))
+    routes = pd.Series(pd.Categorical.from_codes(codes, categories=labels), index=origins.index)
+    routes = routes.cat.remove_unused_categories()
+    return routes.cat.reorder_categories(sorted(routes.cat.categories))
+
+
+# Create route identifier: "ORIGIN→DESTINATION" format
+filtered["Route"] = route_labels(filtered["Origin_Endpoint"], filtered["Destination_Endpoint"])
+
+# ============================================================================
+# AIRLINE GROUP CLASSIFICATION
+# ============================================================================
 
 # Apply group classification to all filtered flights
-filtered["Group"] = filtered["Operating Airline"].apply(label_group)
+# Group codes are picked from two isin masks (Air Berlin Group first) and
+# wrapped as a categorical directly, without an intermediate string column
+airline = filtered["Operating Airline"]
+group_codes = np.select(
+    [airline.isin(AIR_BERLIN_GROUP_CODES), airline.isin(LUFTHANSA_GROUP_CODES)], [0, 1], default=2
+).astype(np.int8)
+filtered["Group"] = pd.Categorical.from_codes(group_codes, categories=GROUP_COLUMNS)
 
 # ============================================================================
 # DEPARTURE AGGREGATION BY ROUTE AND GROUP
@@ -317,140 +361,129 @@ filtered["Group"] = filtered["Operating Airline"].apply(label_group)
 # This creates time series of capacity by group for each route
 agg = (
     filtered
-    .groupby(["Year", "Route", "Group"], dropna=False, observed=False)["Departures"]
+    .groupby(["Year", "Route", "Group"], dropna=False, observed=True)["Departures"]
     .sum()
     .reset_index()
 )
 
-# Also aggregate by Origin Region (use Origin_Endpoint if it is a region else use original Origin Region Name)
-# We'll create an "Origin Region Key" that is the normalized region when endpoint is region, otherwise keep original normalized region
+# Pivot to have AB and LH side-by-side
+# agg is already summed per (Year, Route, Group), so reshape it with unstack
+# instead of re-aggregating through pivot_table
 
-def origin_region_key(row):
-    # if endpoint is a normalized focus region, use that
-    if row["Origin_Endpoint"] in NORMALIZED_FOCUS_REGIONS:
-        return row["Origin_Endpoint"]
-    # else fall back to normalized Origin Region Name
-    return row["Origin Region Name"]
 
-filtered["Origin Region Key"] = filtered.apply(origin_region_key, axis=1)
+def pivot_groups(aggregated, key):
+    """
+    Spread per-group departures into one column per airline group.
 
-region_agg = (
-    filtered
-    .groupby(["Year", "Origin Region Key", "Group"], dropna=False, observed=False)["Departures"]
-    .sum()
-    .reset_index()
-)
+    Args:
+        aggregated (DataFrame): Departures summed by Year, key and Group
+        key (str): Second index column (e.g. "Route")
 
-# Pivot to have AB and LH side-by-side
-pivot = agg.pivot_table(
-    index=["Year", "Route"],
-    columns="Group",
-    values="Departures",
-    aggfunc="sum",
-    fill_value=0
-).reset_index()
-
-# Pivot for regions
-region_pivot = region_agg.pivot_table(
-    index=["Year", "Origin Region Key"],
-    columns="Group",
-    values="Departures",
-    aggfunc="sum",
-    fill_value=0
-).reset_index()
-
-# Ensure columns exist for both pivots
-for col in ["AIR_BERLIN_GROUP", "LUFTHANSA_GROUP", "OTHER"]:
-    if col not in pivot.columns:
-        pivot[col] = 0.0
-    if col not in region_pivot.columns:
-        region_pivot[col] = 0.0
+    Returns:
+        DataFrame: One row per (Year, key) with a column for every group in
+                   GROUP_COLUMNS (0 where a group did not fly)
+
+    Note:
+        Like pivot_table, rows with a missing key are dropped and columns of
+        whole numbers are downcast to integers.
+    """
+    return (
+        aggregated.dropna(subset=["Year", key])
+        .set_index(["Year", key, "Group"])["Departures"]
+        .unstack("Group", fill_value=0)
+        .reindex(columns=GROUP_COLUMNS, fill_value=0)
+        .pipe(lambda wide: wide.fillna(0, downcast="infer"))
+        .reset_index()
+    )
+
+
+pivot = pivot_groups(agg, "Route")
 
 # Split Route back to Origin / Destination for clarity
 pivot[["Origin", "Destination"]] = pivot["Route"].str.split("->", expand=True)
 
+# Keep only routes that Air Berlin group ever flew (any year), sorted once by
+# route and year for both outputs
+ab_routes = pd.Index(pivot.loc[pivot["AIR_BERLIN_GROUP"] > 0, "Route"].unique())
+ab_route_rows = pivot[pivot["Route"].isin(ab_routes)].sort_values(["Route", "Year"])
+
 # Save Air Berlin route frequencies per year (only AB departures)
-ab_freq = pivot[["Year", "Origin", "Destination", "Route", "AIR_BERLIN_GROUP"]].rename(
+# Every year of those routes is kept, including years after AB stopped flying
+ab_freq = ab_route_rows[["Year", "Origin", "Destination", "Route", "AIR_BERLIN_GROUP"]].rename(
     columns={"AIR_BERLIN_GROUP": "AB_Departures"}
-).sort_values(["Route", "Year"])
+)
 ab_freq.to_csv(OUTPUT_AB, index=False)
 
-# Keep only routes that Air Berlin group ever flew (any year)
-ab_routes_set = set(ab_freq["Route"].unique())
-
 # Filter overall years for these routes and compute LH per year
-lh_on_ab_routes = pivot[pivot["Route"].isin(ab_routes_set)].copy()
-lh_on_ab_routes = lh_on_ab_routes[["Year", "Route", "Origin", "Destination", "LUFTHANSA_GROUP", "AIR_BERLIN_GROUP"]]
-lh_on_ab_routes = lh_on_ab_routes.sort_values(["Route", "Year"])
+lh_on_ab_routes = ab_route_rows[["Year", "Route", "Origin", "Destination", "LUFTHANSA_GROUP", "AIR_BERLIN_GROUP"]]
 
 # ============================================================================
 # YEAR-OVER-YEAR CHANGE CALCULATION
 # ============================================================================
 
-def compute_yoy(df_group):
+def year_over_year(route_codes, values):
     """
-    Compute year-over-year changes in Lufthansa departures for a single route.
+    Year-over-year change of a per-route series in one pass over arrays.
 
     Args:
-        df_group (DataFrame): Route-specific data sorted by year
+        route_codes (ndarray): Integer route codes, sorted so each route's
+                               rows are contiguous and in year order
+        values (ndarray): Value for each row, aligned with route_codes
 
     Returns:
-        DataFrame: Enhanced with YoY metrics (LH_Delta, LH_Pct_Change)
+        tuple: (delta, pct_change) float arrays; both are NaN on the first
+               year of a route, and pct_change is NaN where the previous
+               year is 0
 
-    Metrics Calculated:
-        - LH_Departures: Lufthansa Group departures in current year
-        - LH_Delta: Change from previous year (raw departures)
-        - LH_Pct_Change: Percentage change from previous year
-
-    Business Interpretation:
-        - Positive LH_Delta during AB decline → Lufthansa filling gap
-        - Large LH_Pct_Change → Rapid market expansion (red flag for concentration)
-        - LH_Delta > AB departure loss → Overcompensation (market growth or substitution)
+    Note:
+        A row's previous year is the row before it when both share a route
+        code, so no per-route groupby is needed.
     """
-    # Sort chronologically for time series calculations
-    df_group = df_group.sort_values("Year").copy()
-
-    # Extract Lufthansa departures
-    df_group["LH_Departures"] = df_group["LUFTHANSA_GROUP"]
-
-    # Calculate year-over-year absolute change
-    df_group["LH_Delta"] = df_group["LH_Departures"].diff().fillna(pd.NA)
-
-    # Calculate year-over-year percentage change
-    # Handle division by zero (previous year = 0) → result is NA
-    prev = df_group["LH_Departures"].shift(1)
-    pct = (df_group["LH_Departures"] - prev) / prev.replace({0: pd.NA}) * 100
-    df_group["LH_Pct_Change"] = pd.to_numeric(pct, errors='coerce').round(2)
-
-    # Include AB departures for comparative context
-    df_group = df_group[["Year", "Origin", "Destination", "Route", "AIR_BERLIN_GROUP", "LH_Departures", "LH_Delta", "LH_Pct_Change"]]
-    df_group = df_group.rename(columns={"AIR_BERLIN_GROUP": "AB_Departures"})
-
-    return df_group
+    prev = np.full(len(values), np.nan)
+    same_route = route_codes[1:] == route_codes[:-1]
+    prev[1:] = np.where(same_route, values[:-1], np.nan)
+    delta = values - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pct_change = np.where(prev != 0, delta / prev * 100, np.nan)
+    return delta, np.round(pct_change, 2)
+
+# Year-over-year changes in Lufthansa departures, computed for all routes at
+# once (routes sorted by year) instead of a Python loop over routes
+#
+# Metrics Calculated:
+#     - LH_Departures: Lufthansa Group departures in current year
+#     - LH_Delta: Change from previous year (raw departures)
+#     - LH_Pct_Change: Percentage change from previous year
+#
+# Business Interpretation:
+#     - Positive LH_Delta during AB decline → Lufthansa filling gap
+#     - Large LH_Pct_Change → Rapid market expansion (red flag for concentration)
+#     - LH_Delta > AB departure loss → Overcompensation (market growth or substitution)
+
+# Remove rows with missing Year values and convert Year to integer
+# (rows are already in route/year order)
+yoy = lh_on_ab_routes[lh_on_ab_routes["Year"].notna()].astype({"Year": int})
+
+# Extract Lufthansa departures
+lh_departures = yoy["LUFTHANSA_GROUP"]
+
+# Calculate year-over-year absolute and percentage change
+# Division by zero (previous year = 0) → result is NA
+lh_delta, lh_pct_change = year_over_year(
+    yoy["Route"].cat.codes.to_numpy(), lh_departures.to_numpy(dtype=float)
+)
 
 # ============================================================================
 # OUTPUT GENERATION
 # ============================================================================
 
-# Process each route to compute year-over-year changes
-result_list = []
-for route, g in lh_on_ab_routes.groupby("Route", sort=True):
-    # Remove rows with missing Year values
-    gg = g[g["Year"].notna()].copy()
-
-    # Convert Year to integer for proper chronological sorting
-    gg["Year"] = gg["Year"].astype(int)
-
-    # Compute YoY metrics for this route
-    gg = compute_yoy(gg)
-    result_list.append(gg)
-
-# Combine all routes into single output DataFrame
-if result_list:
-    final = pd.concat(result_list, ignore_index=True).sort_values(["Route", "Year"])
-else:
-    # Handle edge case: no Air Berlin routes found
-    final = pd.DataFrame(columns=["Year","Origin","Destination","Route","AB_Departures","LH_Departures","LH_Delta","LH_Pct_Change"])
+# Include AB departures for comparative context
+final = (
+    yoy.assign(LH_Departures=lh_departures, LH_Delta=lh_delta, LH_Pct_Change=lh_pct_change)
+    [["Year", "Origin", "Destination", "Route", "AIR_BERLIN_GROUP", "LH_Departures", "LH_Delta", "LH_Pct_Change"]]
+    .rename(columns={"AIR_BERLIN_GROUP": "AB_Departures"})
+    .reset_index(drop=True)
+)
 
 # ============================================================================
 # SAVE RESULTS
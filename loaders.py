@@ -0,0 +1,153 @@
+"""
+===============================================================================
+SHARED SLOT FILE LOADERS
+===============================================================================
+
+Goal:
+    Read the per-airport slot files under ./slots for the analyses that work
+    from them (Analysis 1, 3 and 4), with one copy of the reader code.
+    Analysis 5 reads schedule.csv through the same string loader.
+
+Caching:
+    Parsed frames are not kept in memory. Each analysis runs as its own
+    script and reads every file once, so an in-process cache would never be
+    hit across analyses, while it would keep frames alive and force a
+    defensive copy on every call.
+
+    Across runs, parsed frames are also stored as Parquet files under
+    ./.slot_cache (override with AIRBERLIN_CACHE_DIR, or set it empty to
+    disable) when pyarrow is installed. A cached file is used only while it
+    is newer than its CSV, so edited inputs are re-parsed automatically.
+
+===============================================================================
+"""
+
+import hashlib
+import os
+import numpy as np
+import pandas as pd
+
+# Input directory containing slot allocation CSV files
+SLOTS_DIR = "slots"
+
+# Directory for Parquet copies of parsed CSV files ("" disables the cache)
+CACHE_DIR = os.environ.get("AIRBERLIN_CACHE_DIR", ".slot_cache")
+
+
+def read_csv_columns(path):
+    """
+    Read just the header of a CSV file.
+
+    Args:
+        path (str): Path to CSV file
+
+    Returns:
+        tuple: Column names as they appear in the file
+
+    Note:
+        Lets callers resolve the columns they need before parsing, so the
+        full read can be restricted with usecols.
+    """
+    return tuple(pd.read_csv(path, nrows=0).columns)
+
+
+def _parquet_cache_path(path, usecols):
+    key = hashlib.sha1(repr((os.path.abspath(path), usecols)).encode()).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{os.path.basename(path)}.{key}.parquet")
+
+
+def read_csv_as_str(path, usecols=None):
+    """
+    Read a CSV file with every column as strings.
+
+    Args:
+        path (str): Path to CSV file
+        usecols (list, optional): Only parse these columns
+
+    Returns:
+        DataFrame: File contents with string (object) columns
+
+    Note:
+        Uses pandas' multi-threaded pyarrow engine when pyarrow is installed
+        and falls back to the default C engine otherwise, so pyarrow stays an
+        optional dependency. Passing usecols skips parsing the other columns.
+        With pyarrow, results are also cached on disk as Parquet.
+    """
+    if usecols is not None:
+        usecols = tuple(usecols)
+    cache_path = _parquet_cache_path(path, usecols) if CACHE_DIR else None
+    if cache_path and os.path.isfile(cache_path) \
+            and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            # Parquet restores missing strings as None; keep CSV-style NaN
+            return pd.read_parquet(cache_path).fillna(np.nan)
+        except Exception:
+            pass
+
+    kwargs = {"dtype": str}
+    if usecols is not None:
+        kwargs["usecols"] = list(usecols)
+    try:
+        df = pd.read_csv(path, engine="pyarrow", **kwargs)
+    except (ImportError, ValueError):
+        df = pd.read_csv(path, **kwargs)
+
+    if cache_path:
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            df.to_parquet(cache_path)
+        except Exception:
+            # No Parquet engine, unwritable directory or unsupported columns:
+            # the cache is only an optimization
+            pass
+    return df
+
+
+def read_new_entrants_for_airport(airport_code, slots_dir=SLOTS_DIR):
+    """
+    Read new entrant airlines for a specific airport.
+
+    Args:
+        airport_code (str): Three-letter airport IATA code
+        slots_dir (str): Directory containing new entrant CSV files
+
+    Returns:
+        tuple: Upper-cased IATA codes of new entrant airlines for this airport
+
+    Note:
+        New entrants are airlines that entered the market after Air Berlin's
+        collapse, potentially filling the capacity gap left behind.
+
+    File Format:
+        Expected file: {airport_code}_NEW_ENTRANT.csv with an airline code
+        column; the second column is used if none of the known names match
+    """
+    fname = os.path.join(slots_dir, f"{airport_code}_NEW_ENTRANT.csv")
+
+    if not os.path.isfile(fname):
+        return ()
+
+    try:
+        header = read_csv_columns(fname)
+    except Exception:
+        return ()
+
+    # Find the airline code column with various possible names
+    columns = {c.strip().upper(): c for c in header}
+    col = next(
+        (columns[alt] for alt in ("AIRLINE_CODE", "AIRLINE", "AIRLINE_IATA", "IATA", "AIRLINECODE")
+         if alt in columns),
+        None,
+    )
+    if col is None:
+        if len(header) < 2:
+            return ()
+        col = header[1]
+
+    # Parse only the code column, then extract and clean airline codes
+    try:
+        df = read_csv_as_str(fname, [col])
+    except Exception:
+        return ()
+    codes = df[col].dropna().astype(str).str.strip().str.upper()
+    return tuple(c for c in codes if c)